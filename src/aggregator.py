@@ -0,0 +1,186 @@
+"""
+===============
+=== Purpose ===
+===============
+
+Streaming aggregation of daily values up to epiweeks.
+
+Rows of (date, key, value) are consumed one at a time (or in chunks), and an
+aggregate for each (epiweek, key) pair is emitted as soon as its epiweek
+closes. Only epiweeks which are still open are held in memory, so arbitrarily
+long streams can be aggregated.
+
+An epiweek closes once a row dated more than `lateness` days after the last
+day of the epiweek has been seen. Rows may arrive out of order within that window.
+Rows which arrive after their epiweek has closed are counted in `num_late`
+and otherwise ignored.
+
+Dates may be given as EpiDate objects or as day indices (see
+EpiDate.get_index). Days are mapped to epiweeks using the shared epicalendar
+tables.
+
+Typical usage:
+````
+rows = [(EpiDate(2017, 11, 14), 'pa', 3), (EpiDate(2017, 11, 15), 'pa', 4)]
+for epiweek, key, value in aggregate(rows, how='sum'):
+  print(epiweek, key, value)
+````
+
+
+=================
+=== Changelog ===
+=================
+
+2026-10-17
+  + initial version
+"""
+
+# standard library
+import heapq
+import operator
+
+# first party
+from delphi.utils.epicalendar import get_calendar
+from delphi.utils.epidate import EpiDate
+from delphi.utils.weekcalendar import MMWR
+
+
+class _State:
+  """Running statistics for one (epiweek, key) pair."""
+
+  __slots__ = ('count', 'sum', 'min', 'max', 'last_day', 'last')
+
+  def __init__(self, day, value):
+    self.count = 1
+    self.sum = value
+    self.min = value
+    self.max = value
+    self.last_day = day
+    self.last = value
+
+  def update(self, day, value):
+    self.count += 1
+    self.sum += value
+    if value < self.min:
+      self.min = value
+    if value > self.max:
+      self.max = value
+    if day >= self.last_day:
+      self.last_day = day
+      self.last = value
+
+  def get(self, how):
+    if how == 'mean':
+      return self.sum / self.count
+    return getattr(self, how)
+
+
+class EpiweekAggregator:
+  """Aggregates a stream of daily values by epiweek and key."""
+
+  FUNCTIONS = ('sum', 'mean', 'count', 'min', 'max', 'last')
+
+  def __init__(self, how='sum', lateness=0):
+    """
+    `how` is one of FUNCTIONS, or a tuple of them, in which case each emitted
+    value is a tuple of the corresponding aggregates. `lateness` is the number
+    of days after the end of an epiweek during which rows for that epiweek are
+    still accepted.
+    """
+    names = (how,) if isinstance(how, str) else tuple(how)
+    for name in names:
+      if name not in EpiweekAggregator.FUNCTIONS:
+        raise Exception('unknown aggregate [%s]' % name)
+    if lateness < 0:
+      raise Exception('lateness must be non-negative')
+    self.how = how
+    self.lateness = lateness
+    self.num_late = 0
+    # open weeks, by first day: (epiweek, {key: _State})
+    self._weeks = {}
+    # heap of the first days of open weeks
+    self._heap = []
+    # latest day seen so far
+    self._latest = None
+
+  def _get_value(self, state):
+    if isinstance(self.how, str):
+      return state.get(self.how)
+    return tuple(state.get(name) for name in self.how)
+
+  def _is_closed(self, first_day):
+    """Return whether the week starting on the given day has closed."""
+    if self._latest is None:
+      return False
+    return first_day + 7 + self.lateness <= self._latest
+
+  def _pop_week(self, results):
+    """Remove the earliest open week, appending its aggregates to results."""
+    epiweek, states = self._weeks.pop(heapq.heappop(self._heap))
+    for key, state in states.items():
+      results.append((epiweek, key, self._get_value(state)))
+
+  def _close_weeks(self):
+    """Remove and return the aggregates of all weeks that have closed."""
+    results = []
+    while self._heap and self._is_closed(self._heap[0]):
+      self._pop_week(results)
+    return results
+
+  def push(self, date, key, value):
+    """
+    Add one row, returning a (possibly empty) list of (epiweek, key, value)
+    tuples for the weeks which have closed as a result.
+    """
+    day = date.get_index() if isinstance(date, EpiDate) else operator.index(date)
+    # epiweeks start on Sunday, and day 0 is a Monday
+    first_day = day - (day + 1) % 7
+    if self._is_closed(first_day):
+      self.num_late += 1
+      return []
+    week = self._weeks.get(first_day)
+    if week is None:
+      epiweek = get_calendar().get_epiweek(day)
+      if epiweek is None:
+        epiweek = MMWR.day_to_week(day)
+      week = self._weeks[first_day] = (epiweek, {})
+      heapq.heappush(self._heap, first_day)
+    states = week[1]
+    state = states.get(key)
+    if state is None:
+      states[key] = _State(day, value)
+    else:
+      state.update(day, value)
+    if self._latest is None or day > self._latest:
+      self._latest = day
+      return self._close_weeks()
+    return []
+
+  def push_many(self, rows):
+    """Add an iterable of (date, key, value) rows, returning closed weeks."""
+    results = []
+    for date, key, value in rows:
+      results.extend(self.push(date, key, value))
+    return results
+
+  def push_arrays(self, dates, keys, values):
+    """Add a chunk of rows given as parallel sequences (or arrays)."""
+    return self.push_many(zip(dates, keys, values))
+
+  def flush(self):
+    """Close all open weeks, returning their aggregates."""
+    results = []
+    while self._heap:
+      self._pop_week(results)
+    return results
+
+
+def aggregate(rows, how='sum', lateness=0):
+  """
+  Aggregate an iterable of (date, key, value) rows, yielding
+  (epiweek, key, value) tuples as each epiweek closes.
+  """
+  aggregator = EpiweekAggregator(how=how, lateness=lateness)
+  for date, key, value in rows:
+    yield from aggregator.push(date, key, value)
+  yield from aggregator.flush()
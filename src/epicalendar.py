@@ -0,0 +1,157 @@
+"""
+===============
+=== Purpose ===
+===============
+
+Dense lookup tables for converting between days and epiweeks.
+
+Days are represented by their index, as in EpiDate.get_index (day 0 is
+0001-01-01). The tables cover every day of every epiweek in the years
+[FIRST_YEAR, LAST_YEAR) as defined in epiweek.py, so that converting a day to
+its epiweek, or an epiweek to its first day, is a single array lookup.
+
+The tables can be saved to a compact binary file, which can then be
+memory-mapped by any number of processes. The operating system shares the
+mapped pages, so a pool of workers holds only one copy of the tables.
+
+Typical usage:
+````
+# in the parent process
+Calendar.build().save('epiweeks.cal')
+
+# in each worker process (e.g. a pool initializer)
+set_calendar(Calendar.load('epiweeks.cal'))
+````
+
+If no calendar has been set, one is built in memory on first use.
+
+
+=================
+=== Changelog ===
+=================
+
+2026-10-17
+  + initial version
+"""
+
+# standard library
+import array
+import mmap
+import struct
+import sys
+
+# first party
+from delphi.utils.epiweek import FIRST_YEAR, LAST_YEAR
+from delphi.utils.epiweek import get_num_weeks, join_epiweek, split_epiweek
+from delphi.utils.weekcalendar import MMWR
+
+
+class Calendar:
+  """Day-to-epiweek and epiweek-to-day lookup tables."""
+
+  # file format: magic, byte order, first year, last year, first day, num days
+  MAGIC = b'EPICAL01'
+  HEADER = struct.Struct('<8s5i')
+
+  # weeks are stored in slots of 53 per year, whether or not week 53 exists
+  WEEKS_PER_YEAR = 53
+
+  def __init__(self, first_year, last_year, first_day, epiweeks, first_days):
+    self.first_year = first_year
+    self.last_year = last_year
+    self.first_day = first_day
+    # epiweek of day `first_day + i`
+    self.epiweeks = epiweeks
+    # first day of week `w` in year `y`, at `(y - first_year) * 53 + w - 1`;
+    # -1 where the week doesn't exist
+    self.first_days = first_days
+
+  def get_epiweek(self, index, default=None):
+    """Return the epiweek containing the given day index."""
+    i = index - self.first_day
+    if 0 <= i < len(self.epiweeks):
+      return self.epiweeks[i]
+    return default
+
+  def get_first_day(self, epiweek, default=None):
+    """Return the index of the first day (Sunday) of the given epiweek."""
+    year, week = split_epiweek(epiweek)
+    if self.first_year <= year < self.last_year and 1 <= week <= 53:
+      i = (year - self.first_year) * Calendar.WEEKS_PER_YEAR + week - 1
+      day = self.first_days[i]
+      if day >= 0:
+        return day
+    return default
+
+  def save(self, filename):
+    """Write the tables to a binary file which can be memory-mapped."""
+    header = Calendar.HEADER.pack(
+      Calendar.MAGIC,
+      Calendar._get_byte_order(),
+      self.first_year,
+      self.last_year,
+      self.first_day,
+      len(self.epiweeks),
+    )
+    with open(filename, 'wb') as f:
+      f.write(header)
+      f.write(array.array('i', self.epiweeks).tobytes())
+      f.write(array.array('i', self.first_days).tobytes())
+
+  @staticmethod
+  def load(filename):
+    """Memory-map the tables in a file previously written by `save`."""
+    with open(filename, 'rb') as f:
+      buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    magic, byte_order, first_year, last_year, first_day, num_days = \
+      Calendar.HEADER.unpack_from(buffer)
+    if magic != Calendar.MAGIC:
+      raise Exception('not a calendar file [%s]' % filename)
+    if byte_order != Calendar._get_byte_order():
+      raise Exception('calendar file has wrong byte order [%s]' % filename)
+    num_weeks = (last_year - first_year) * Calendar.WEEKS_PER_YEAR
+    ints = memoryview(buffer)[Calendar.HEADER.size:].cast('i')
+    if len(ints) != num_days + num_weeks:
+      raise Exception('calendar file is truncated [%s]' % filename)
+    epiweeks = ints[:num_days]
+    first_days = ints[num_days:]
+    return Calendar(first_year, last_year, first_day, epiweeks, first_days)
+
+  @staticmethod
+  def build(first_year=FIRST_YEAR, last_year=LAST_YEAR):
+    """Compute the tables for epiweeks in the years [first_year, last_year)."""
+    first_day = MMWR.get_first_day(first_year)
+    epiweeks = array.array('i')
+    first_days = array.array('i')
+    day = first_day
+    for year in range(first_year, last_year):
+      num_weeks = get_num_weeks(year)
+      for week in range(1, num_weeks + 1):
+        epiweeks.extend([join_epiweek(year, week)] * 7)
+        first_days.append(day)
+        day += 7
+      first_days.extend([-1] * (Calendar.WEEKS_PER_YEAR - num_weeks))
+    return Calendar(first_year, last_year, first_day, epiweeks, first_days)
+
+  @staticmethod
+  def _get_byte_order():
+    """Return a flag identifying the native byte order of the tables."""
+    return 1 if sys.byteorder == 'little' else 0
+
+
+# the calendar used by `get_calendar`, built on first use unless set explicitly
+_calendar = None
+
+
+def get_calendar():
+  """Return the shared calendar, building it if necessary."""
+  global _calendar
+  if _calendar is None:
+    _calendar = Calendar.build()
+  return _calendar
+
+
+def set_calendar(calendar):
+  """Replace the shared calendar, for example with one loaded from a file."""
+  global _calendar
+  _calendar = calendar
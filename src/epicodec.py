@@ -0,0 +1,179 @@
+"""
+===============
+=== Purpose ===
+===============
+
+Bulk parsing and formatting of date and epiweek strings.
+
+These functions convert whole columns of values at once, for example when
+loading or writing CSV files. Dates are converted to and from day indices (as
+in EpiDate.get_index) and epiweeks to and from ints, without constructing an
+EpiDate for each value. Repeated values, which are typical of such columns,
+are only parsed or formatted once.
+
+Supported formats:
+  dates: YYYYMMDD, YYYY-MM-DD
+  epiweeks: YYYYWW, YYYYwWW
+
+Input may be any iterable of str or bytes values, or a bytes-like object (such
+as bytes, bytearray, mmap, or memoryview) holding one value per line. Bad
+values don't raise an exception. Instead, parse functions return a list of
+(row, value) pairs describing the rows that couldn't be parsed.
+
+Typical usage:
+````
+indices, errors = parse_dates(['2017-11-14', '20171115', 'oops'])
+# indices == [736646, 736647, None]
+# errors == [(2, 'oops')]
+````
+
+
+=================
+=== Changelog ===
+=================
+
+2026-10-17
+  + initial version
+"""
+
+# standard library
+import mmap
+import re
+
+# first party
+from delphi.utils.epidate import EpiDate
+from delphi.utils.epiweek import get_num_weeks, join_epiweek, split_epiweek
+
+# a line of a buffer, with its line break, or the unterminated last line
+_LINE = re.compile(rb'([^\r\n]*)(?:\r\n?|\n)|([^\r\n]+)\Z')
+
+
+def _iter_buffer_lines(buffer):
+  """Yield the lines of a buffer as str, without copying the whole buffer."""
+  for match in _LINE.finditer(buffer):
+    line = match.group(1)
+    if line is None:
+      line = match.group(2)
+    yield line.decode('ascii', 'replace')
+
+
+def _get_lines(values):
+  """Return an iterable of str from a buffer or an iterable of str/bytes."""
+  if isinstance(values, (bytes, bytearray, memoryview, mmap.mmap)):
+    # a buffer with one value per line
+    return _iter_buffer_lines(values)
+  return (v.decode('ascii', 'replace') if isinstance(v, bytes) else v for v in values)
+
+
+def _is_number(s):
+  """Return whether the string consists only of ASCII digits."""
+  return s.isascii() and s.isdigit()
+
+
+def _parse_date(s):
+  """Return the day index of a date string, or None if it's invalid."""
+  if len(s) == 8:
+    digits = s
+  elif len(s) == 10 and s[4] == '-' and s[7] == '-':
+    digits = s[:4] + s[5:7] + s[8:]
+  else:
+    return None
+  if not _is_number(digits):
+    return None
+  year, month, day = int(digits[:4]), int(digits[4:6]), int(digits[6:])
+  if year < 1 or not 1 <= month <= 12 or day < 1:
+    return None
+  leap_day = 1 if month == 2 and EpiDate._is_leap_year(year) else 0
+  if day > EpiDate.DAYS_PER_MONTH[month - 1] + leap_day:
+    return None
+  return EpiDate._get_index(year, month, day)
+
+
+def _parse_epiweek(s):
+  """Return the epiweek int of an epiweek string, or None if it's invalid."""
+  if len(s) == 6:
+    digits = s
+  elif len(s) == 7 and s[4] in 'wW':
+    digits = s[:4] + s[5:]
+  else:
+    return None
+  if not _is_number(digits):
+    return None
+  year, week = int(digits[:4]), int(digits[4:])
+  try:
+    if not 1 <= week <= get_num_weeks(year):
+      return None
+  except Exception:
+    return None
+  return join_epiweek(year, week)
+
+
+def _parse(values, parse):
+  """Parse each value, returning a (results, errors) pair."""
+  results, errors, cache = [], [], {}
+  for row, value in enumerate(_get_lines(values)):
+    if value in cache:
+      result = cache[value]
+    else:
+      result = cache[value] = parse(value.strip())
+    if result is None:
+      errors.append((row, value))
+    results.append(result)
+  return results, errors
+
+
+def _format(values, format_one, as_bytes):
+  """Format each value, returning a list of str or newline-separated bytes."""
+  cache = {}
+  results = []
+  for value in values:
+    if value not in cache:
+      cache[value] = format_one(value)
+    results.append(cache[value])
+  if as_bytes:
+    return ''.join(r + '\n' for r in results).encode('ascii')
+  return results
+
+
+def parse_dates(values):
+  """
+  Parse YYYYMMDD or YYYY-MM-DD strings to day indices.
+
+  Returns a (indices, errors) pair, where `indices` has one entry per row
+  (None for bad rows) and `errors` is a list of (row, value) pairs.
+  """
+  return _parse(values, _parse_date)
+
+
+def parse_epiweeks(values):
+  """
+  Parse YYYYWW or YYYYwWW strings to epiweek ints.
+
+  Returns a (epiweeks, errors) pair, where `epiweeks` has one entry per row
+  (None for bad rows) and `errors` is a list of (row, value) pairs.
+  """
+  return _parse(values, _parse_epiweek)
+
+
+def format_dates(indices, sep='-', as_bytes=False):
+  """
+  Format day indices as YYYY-MM-DD (or YYYYMMDD if `sep` is empty) strings.
+
+  If `as_bytes` is True, return a bytes buffer with one date per line.
+  """
+  def format_one(index):
+    date = EpiDate.from_index(index)
+    return '%04d%s%02d%s%02d' % (date.year, sep, date.month, sep, date.day)
+  return _format(indices, format_one, as_bytes)
+
+
+def format_epiweeks(epiweeks, sep='', as_bytes=False):
+  """
+  Format epiweeks as YYYYWW (or YYYYwWW if `sep` is "w") strings.
+
+  If `as_bytes` is True, return a bytes buffer with one epiweek per line.
+  """
+  def format_one(epiweek):
+    year, week = split_epiweek(epiweek)
+    return '%04d%s%02d' % (year, sep, week)
+  return _format(epiweeks, format_one, as_bytes)
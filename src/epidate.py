@@ -11,19 +11,33 @@ https://github.com/cmu-delphi/www-epivis/blob/master/site/js/epivis.js
 === Changelog ===
 =================
 
+2026-10-17
+  * get_ew and from_epiweek look up epiweeks in a precomputed calendar
+  * from_epiweek computes the date directly instead of searching for it
+  + from_epiweeks
+  * get_ew computes epi-year and epi-week together using cached year anchors
+  * EpiDate is immutable, hashable, and ordered, and caches its day index
+  + subtracting two dates gives the number of days between them
+  * from_index decodes the date without loops and without revalidating it
+  * epiweek anchors come from the MMWR calendar of weekcalendar.py
 2016-12-12
   * checking in existing version
 """
 
 # standard library
 import datetime
+import functools
 
 # first party
-from delphi.utils.epiweek import get_num_weeks
+from delphi.utils.epicalendar import get_calendar
+from delphi.utils.epiweek import get_num_weeks, join_epiweek, split_epiweek
+from delphi.utils.weekcalendar import MMWR
 
 
 class EpiDate:
 
+  __slots__ = ('year', 'month', 'day', '_index')
+
   DAYS_PER_MONTH = [31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31]
   CUMULATIVE_DAYS_PER_MONTH = [0, 31, 59, 90, 120, 151, 181, 212, 243, 273, 304, 334]
   DAY_OF_WEEK_TABLE = [0, 3, 2, 5, 0, 3, 5, 1, 4, 6, 2, 4]
@@ -35,18 +49,21 @@ class EpiDate:
   def __init__(self, year, month, day):
     if year < 1 or month < 1 or month > 12 or day < 1 or day > EpiDate.DAYS_PER_MONTH[month - 1] + (1 if month == 2 and EpiDate._is_leap_year(year) else 0):
        raise Exception('invalid date: %d/%d/%d'%(year, month, day))
-    self.year = year
-    self.month = month
-    self.day = day
+    # instances are immutable, so attributes are set through `object`
+    object.__setattr__(self, 'year', year)
+    object.__setattr__(self, 'month', month)
+    object.__setattr__(self, 'day', day)
+    object.__setattr__(self, '_index', EpiDate._get_index(year, month, day))
 
   def is_leap_year(self):
     return EpiDate._is_leap_year(self.year)
 
   def get_index(self):
-    return EpiDate._get_index(self.year, self.month, self.day)
+    return self._index
 
   def get_day_of_week(self):
-    return EpiDate._get_day_of_week(self.year, self.month, self.day)
+    # index 0 (0001-01-01) is a Monday
+    return (self._index + 1) % 7
 
   def get_year(self):
     return self.year
@@ -58,27 +75,16 @@ class EpiDate:
     return self.day
 
   def get_ew_year(self):
-    this_date = self.get_index()
-    first_date1 = EpiDate._get_index(self.year, 1, 4) - EpiDate._get_day_of_week(self.year, 1, 4)
-    if this_date < first_date1:
-      y = -1
-    else:
-      first_date2 = EpiDate._get_index(self.year + 1, 1, 4) - EpiDate._get_day_of_week(self.year + 1, 1, 4)
-      y = 0 if this_date < first_date2 else 1
-    return self.year + y
+    return split_epiweek(self.get_ew())[0]
 
   def get_ew_week(self):
-    this_date = self.get_index()
-    first_date1 = EpiDate._get_index(self.year, 1, 4) - EpiDate._get_day_of_week(self.year, 1, 4)
-    if this_date < first_date1:
-      first_date = EpiDate._get_index(self.year - 1, 1, 4) - EpiDate._get_day_of_week(self.year - 1, 1, 4)
-    else:
-      first_date2 = EpiDate._get_index(self.year + 1, 1, 4) - EpiDate._get_day_of_week(self.year + 1, 1, 4)
-      first_date = first_date1 if this_date < first_date2 else first_date2
-    return ((this_date - first_date) // 7) + 1
+    return split_epiweek(self.get_ew())[1]
 
   def get_ew(self):
-    return self.get_ew_year() * 100 + self.get_ew_week()
+    ew = get_calendar().get_epiweek(self.get_index())
+    if ew is None:
+      ew = join_epiweek(*self._compute_ew())
+    return ew
 
   def add_days(self, num):
     return EpiDate.from_index(self.get_index() + num)
@@ -100,6 +106,57 @@ class EpiDate:
   def __str__(self):
     return '%04d-%02d-%02d'%(self.year, self.month, self.day)
 
+  def __repr__(self):
+    return 'EpiDate(%d, %d, %d)'%(self.year, self.month, self.day)
+
+  def __setattr__(self, name, value):
+    raise AttributeError('EpiDate is immutable')
+
+  def __delattr__(self, name):
+    raise AttributeError('EpiDate is immutable')
+
+  def __reduce__(self):
+    return (EpiDate, (self.year, self.month, self.day))
+
+  def __hash__(self):
+    return hash(self._index)
+
+  def __eq__(self, other):
+    if not isinstance(other, EpiDate):
+      return NotImplemented
+    return self._index == other._index
+
+  def __ne__(self, other):
+    if not isinstance(other, EpiDate):
+      return NotImplemented
+    return self._index != other._index
+
+  def __lt__(self, other):
+    if not isinstance(other, EpiDate):
+      return NotImplemented
+    return self._index < other._index
+
+  def __le__(self, other):
+    if not isinstance(other, EpiDate):
+      return NotImplemented
+    return self._index <= other._index
+
+  def __gt__(self, other):
+    if not isinstance(other, EpiDate):
+      return NotImplemented
+    return self._index > other._index
+
+  def __ge__(self, other):
+    if not isinstance(other, EpiDate):
+      return NotImplemented
+    return self._index >= other._index
+
+  def __sub__(self, other):
+    # the number of days between two dates
+    if not isinstance(other, EpiDate):
+      return NotImplemented
+    return self._index - other._index
+
   @staticmethod
   def get_day_name(day, short=False):
     names = EpiDate.DAY_NAMES_SHORT if short else EpiDate.DAY_NAMES_LONG
@@ -126,37 +183,68 @@ class EpiDate:
 
   @staticmethod
   def from_index(index):
-    x = index
-    year, index = index // 365, index % 365
-    leaps = (year // 4) - (year // 100) + (year // 400)
-    index = index - leaps + year * 365
-    year = (index // 365) + 1
-    y = (year + 399) % 400
-    year_offset = (((year - 1) // 400) * 146097) + (y * 365) + (y // 4) - (y // 100) + (y // 400)
-    if x - year_offset == 365 and EpiDate._is_leap_year(year + 1):
-      year += 1
-      year_offset += 365
-    index = x - year_offset
-    m = 1
-    leap = 1 if EpiDate._is_leap_year(year) else 0
-    while m < 12 and EpiDate.CUMULATIVE_DAYS_PER_MONTH[m] + (leap if m >= 2 else 0) <= index:
-       m += 1
-    index -= EpiDate.CUMULATIVE_DAYS_PER_MONTH[m - 1] + (1 if m > 2 and EpiDate._is_leap_year(year) else 0)
-    return EpiDate(year, m, index + 1)
+    if index < 0:
+      raise Exception('invalid index: %d'%index)
+    # count days from 0000-03-01 so that leap days fall at the end of the year
+    index += 306
+    era, day_of_era = divmod(index, 146097)
+    year_of_era = (day_of_era - day_of_era // 1460 + day_of_era // 36524 - day_of_era // 146096) // 365
+    day_of_year = day_of_era - (year_of_era * 365 + year_of_era // 4 - year_of_era // 100)
+    month, day, year_shift = _MARCH_YEAR_TABLE[day_of_year]
+    year = era * 400 + year_of_era + year_shift
+    return EpiDate._from_trusted(year, month, day, index - 306)
 
   @staticmethod
   def from_epiweek(year, week):
-    if year < 1 or week < 1 or week > get_num_weeks(year):
-      raise Exception('invalid year or week')
-    date = EpiDate(year, 7, 1)
-    while date.get_ew_week() < week:
-      date = date.add_weeks(+1)
-    while date.get_ew_week() > week:
-      date = date.add_weeks(-1)
-    while date.get_day_of_week() < 3:
-      date = date.add_days(+1)
-    while date.get_day_of_week() > 3:
-      date = date.add_days(-1)
+    return EpiDate.from_index(EpiDate._get_ew_wednesday(year, week))
+
+  @staticmethod
+  def from_epiweeks(epiweeks, index=False):
+    # convert many epiweeks at once, to dates or (if `index`) day indices
+    indices = [EpiDate._get_ew_wednesday(*split_epiweek(ew)) for ew in epiweeks]
+    if index:
+      return indices
+    return [EpiDate.from_index(i) for i in indices]
+
+  @staticmethod
+  def _get_ew_wednesday(year, week):
+    # index of the Wednesday of the epiweek
+    first_day = get_calendar().get_first_day(join_epiweek(year, week))
+    if first_day is None:
+      if year < 1 or week < 1 or week > get_num_weeks(year):
+        raise Exception('invalid year or week')
+      first_day = EpiDate._get_ew_anchor(year) + (week - 1) * 7
+    return first_day + 3
+
+  @staticmethod
+  @functools.lru_cache(maxsize=1024)
+  def _get_ew_anchor(year):
+    # index of the first day (Sunday) of the first epiweek of the year
+    return MMWR.get_first_day(year)
+
+  def _compute_ew(self):
+    # epi-year and epi-week in one pass, for dates outside of the calendar
+    this_date = self.get_index()
+    year = self.year
+    first_date = EpiDate._get_ew_anchor(year)
+    if this_date < first_date:
+      year -= 1
+      first_date = EpiDate._get_ew_anchor(year)
+    else:
+      next_first_date = EpiDate._get_ew_anchor(year + 1)
+      if this_date >= next_first_date:
+        year += 1
+        first_date = next_first_date
+    return year, ((this_date - first_date) // 7) + 1
+
+  @staticmethod
+  def _from_trusted(year, month, day, index):
+    # construct a date that is valid by construction, skipping validation
+    date = object.__new__(EpiDate)
+    object.__setattr__(date, 'year', year)
+    object.__setattr__(date, 'month', month)
+    object.__setattr__(date, 'day', day)
+    object.__setattr__(date, '_index', index)
     return date
 
   @staticmethod
@@ -175,3 +263,17 @@ class EpiDate:
   def _get_day_of_week(year, month, day):
     y = year - (1 if month < 3 else 0)
     return (y + (y // 4) - (y // 100) + (y // 400) + EpiDate.DAY_OF_WEEK_TABLE[month - 1] + day) % 7
+
+
+def _get_march_year_table():
+  # (month, day, year shift) of each day in a year that starts on March 1;
+  # January and February belong to the next calendar year
+  table = []
+  for month in list(range(3, 13)) + [1, 2]:
+    num_days = 29 if month == 2 else EpiDate.DAYS_PER_MONTH[month - 1]
+    table.extend((month, day, int(month <= 2)) for day in range(1, num_days + 1))
+  return tuple(table)
+
+
+# day of year lookup table for EpiDate.from_index
+_MARCH_YEAR_TABLE = _get_march_year_table()
@@ -0,0 +1,219 @@
+"""
+===============
+=== Purpose ===
+===============
+
+Vectorized, epiweek-aware date arithmetic over NumPy arrays.
+
+An EpiDateArray holds a column of dates as an int32 array of day indices, as
+in EpiDate.get_index (day 0 is 0001-01-01). It provides the same operations as
+EpiDate, but on every date in the column at once, and it converts to and from
+lists of EpiDate objects and NumPy `datetime64[D]` arrays.
+
+Epiweek conversions are supported for every date, as in EpiDate.
+
+NumPy is only required by this file. Importing epidate.py does not require it.
+
+
+=================
+=== Changelog ===
+=================
+
+2026-10-17
+  + initial version
+"""
+
+# third party
+import numpy as np
+
+# first party
+import delphi.utils.epiweek_array as utils_epiweek_array
+from delphi.utils.epidate import EpiDate
+from delphi.utils.epiweek import FIRST_YEAR
+
+
+# day index of 1970-01-01, the epoch of `datetime64`
+_DATETIME64_EPOCH = EpiDate(1970, 1, 1).get_index()
+
+# day index of the first day of the first epiweek in `FIRST_YEAR`
+_FIRST_DAY = EpiDate.from_epiweek(FIRST_YEAR, 1).get_index() - 3
+
+# days in each month of a common year
+_DAYS_PER_MONTH = np.array(EpiDate.DAYS_PER_MONTH)
+
+
+def _from_index(indices):
+  """Return the (years, months, days) arrays of the day indices."""
+  # same algorithm as EpiDate.from_index, with years starting on March 1
+  z = np.asarray(indices, dtype=np.int64) + 306
+  era, day_of_era = np.divmod(z, 146097)
+  year_of_era = (
+    day_of_era - day_of_era // 1460 + day_of_era // 36524 -
+    day_of_era // 146096
+  ) // 365
+  day_of_year = day_of_era - (
+    year_of_era * 365 + year_of_era // 4 - year_of_era // 100
+  )
+  m = (day_of_year * 5 + 2) // 153
+  days = day_of_year - (m * 153 + 2) // 5 + 1
+  months = np.where(m < 10, m + 3, m - 9)
+  years = era * 400 + year_of_era + (months <= 2)
+  return years, months, days
+
+
+def _to_index(years, months, days):
+  """Return the day indices of the (years, months, days) arrays."""
+  years = np.asarray(years, dtype=np.int64) - (np.asarray(months) <= 2)
+  era, year_of_era = np.divmod(years, 400)
+  m = (np.asarray(months) + 9) % 12
+  day_of_year = (m * 153 + 2) // 5 + np.asarray(days) - 1
+  day_of_era = (
+    year_of_era * 365 + year_of_era // 4 - year_of_era // 100 + day_of_year
+  )
+  return era * 146097 + day_of_era - 306
+
+
+def _is_leap_year(years):
+  """Return a boolean mask which is True for leap years."""
+  return ((years % 4 == 0) & (years % 100 != 0)) | (years % 400 == 0)
+
+
+def _get_days_in_month(years, months):
+  """Return the number of days in each month."""
+  return _DAYS_PER_MONTH[months - 1] + ((months == 2) & _is_leap_year(years))
+
+
+class EpiDateArray:
+  """A column of dates stored as an int32 array of day indices."""
+
+  def __init__(self, indices):
+    self.indices = np.asarray(indices, dtype=np.int32)
+    if self.indices.ndim != 1:
+      raise Exception('expected a one-dimensional array of day indices')
+    if np.any(self.indices < 0):
+      raise Exception('invalid index')
+
+  def __len__(self):
+    return len(self.indices)
+
+  def __iter__(self):
+    return iter(self.to_dates())
+
+  def __getitem__(self, i):
+    if isinstance(i, slice):
+      return EpiDateArray(self.indices[i])
+    return EpiDate.from_index(int(self.indices[i]))
+
+  def __eq__(self, other):
+    if not isinstance(other, EpiDateArray):
+      return NotImplemented
+    return np.array_equal(self.indices, other.indices)
+
+  def __repr__(self):
+    return 'EpiDateArray(%s)' % [str(d) for d in self]
+
+  def get_index(self):
+    return self.indices.copy()
+
+  def get_year(self):
+    return _from_index(self.indices)[0]
+
+  def get_month(self):
+    return _from_index(self.indices)[1]
+
+  def get_day(self):
+    return _from_index(self.indices)[2]
+
+  def get_day_of_week(self):
+    # index 0 (0001-01-01) is a Monday
+    return (self.indices + 1) % 7
+
+  def get_ew(self):
+    ordinals = (self.indices.astype(np.int64) - _FIRST_DAY) // 7
+    return utils_epiweek_array.ordinal_to_epiweek(ordinals)
+
+  def get_ew_year(self):
+    return utils_epiweek_array.split_epiweek(self.get_ew())[0]
+
+  def get_ew_week(self):
+    return utils_epiweek_array.split_epiweek(self.get_ew())[1]
+
+  def add_days(self, num):
+    return EpiDateArray(self.indices + np.asarray(num))
+
+  def add_weeks(self, num):
+    return self.add_days(np.asarray(num) * 7)
+
+  def add_months(self, num):
+    years, months, days = _from_index(self.indices)
+    m = years * 12 + (months - 1) + np.asarray(num)
+    years, months = m // 12, (m % 12) + 1
+    if np.any(years < 1):
+      raise Exception('invalid date')
+    days = np.minimum(days, _get_days_in_month(years, months))
+    return EpiDateArray(_to_index(years, months, days))
+
+  def add_years(self, num):
+    return self.add_months(np.asarray(num) * 12)
+
+  def to_dates(self):
+    return [EpiDate.from_index(i) for i in self.indices.tolist()]
+
+  def to_datetime64(self):
+    days = self.indices.astype(np.int64) - _DATETIME64_EPOCH
+    return days.astype('datetime64[D]')
+
+  def to_strings(self):
+    return [str(d) for d in self.to_dates()]
+
+  @staticmethod
+  def from_dates(dates):
+    return EpiDateArray([d.get_index() for d in dates])
+
+  @staticmethod
+  def from_datetime64(values):
+    days = np.asarray(values).astype('datetime64[D]').astype(np.int64)
+    return EpiDateArray(days + _DATETIME64_EPOCH)
+
+  @staticmethod
+  def from_ymd(years, months, days):
+    years, months, days = np.broadcast_arrays(
+      np.asarray(years, dtype=np.int64),
+      np.asarray(months, dtype=np.int64),
+      np.asarray(days, dtype=np.int64),
+    )
+    valid = (years >= 1) & (months >= 1) & (months <= 12) & (days >= 1)
+    valid[valid] &= days[valid] <= _get_days_in_month(years[valid], months[valid])
+    if not np.all(valid):
+      i = np.argmin(valid)
+      args = (years[i], months[i], days[i])
+      raise Exception('invalid date: %d/%d/%d' % args)
+    return EpiDateArray(_to_index(years, months, days))
+
+  @staticmethod
+  def from_strings(strs):
+    # like EpiDate.from_string, each string is YYYYMMDD or YYYY_MM_DD, where
+    # "_" is any single character
+    strs = np.asarray(strs, dtype=str)
+    if strs.size == 0:
+      return EpiDateArray([])
+    lengths = np.char.str_len(strs)
+    if not np.all((lengths == 8) | (lengths == 10)):
+      raise Exception('expected YYYYMMDD or YYYY_MM_DD')
+    chars = strs.astype('U10').reshape(-1, 1).view('U1').astype('S1')
+    digits = chars.view(np.uint8).astype(np.int64) - ord('0')
+    is_long = (lengths == 10).reshape(-1, 1)
+    # drop the separators from long strings, leaving 8 digits in each row
+    digits = np.where(is_long, digits[:, [0, 1, 2, 3, 5, 6, 8, 9]], digits[:, :8])
+    if np.any((digits < 0) | (digits > 9)):
+      raise Exception('expected YYYYMMDD or YYYY_MM_DD')
+    years = digits[:, :4] @ np.array([1000, 100, 10, 1])
+    months = digits[:, 4:6] @ np.array([10, 1])
+    days = digits[:, 6:8] @ np.array([10, 1])
+    return EpiDateArray.from_ymd(years, months, days)
+
+  @staticmethod
+  def from_epiweek(epiweeks):
+    # the Wednesday of each epiweek
+    ordinals = utils_epiweek_array.epiweek_to_ordinal(epiweeks)
+    return EpiDateArray(np.ravel(_FIRST_DAY + ordinals * 7 + 3))
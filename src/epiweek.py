@@ -12,6 +12,15 @@ Note: this file was previously named "fluv_utils.py".
 === Changelog ===
 =================
 
+2026-10-17
+  + epiweek_to_ordinal and ordinal_to_epiweek
+  * add_epiweeks and delta_epiweeks use ordinals instead of walking years
+  + EpiweekRange, a lazy sequence of epiweeks
+  * range_epiweeks is a wrapper around EpiweekRange
+  + validate_epiweeks, for checking many epiweeks without exceptions
+  * number of weeks in year is computed for any year, not just [1900, 2100)
+  * epiweeks are the MMWR calendar of weekcalendar.py
+  + partition_epiweeks, for splitting a range into balanced chunks
 2016-12-12
   * rename file from "fluv_utils.py" to "epiweek.py"
 2016-01-30
@@ -24,6 +33,16 @@ Note: this file was previously named "fluv_utils.py".
   + added "Read Me" and "Changes and Updates" headers
 """
 
+# standard library
+import bisect
+import itertools
+
+# first party
+from delphi.utils.weekcalendar import MMWR
+
+# years in [FIRST_YEAR, LAST_YEAR) are served from precomputed tables
+FIRST_YEAR, LAST_YEAR = MMWR.first_year, MMWR.last_year
+
 
 def split_epiweek(epiweek):
   """ return a (year, week) pair from this epiweek """
@@ -49,36 +68,39 @@ def check_epiweek(*epiweeks, fatal=True):
 
 def get_num_weeks(year):
   """ return the number of epiweeks in the year """
-  if not 1900 <= year < 2100:
+  if year < 1:
     raise Exception('not sure how many epiweeks: year=%d' % year)
-  elif (year % 28) in [4, 9, 15, 20, 26]:
-    return 53
-  else:
-    return 52
+  return MMWR.get_num_weeks(year)
+
+
+def validate_epiweeks(epiweeks, failures=False, count=False):
+  """
+  check any number of epiweeks in a single pass, without raising exceptions
+  by default, return a list of booleans which are True for valid epiweeks
+  if "failures" is True, instead return a list of (index, reason) pairs for
+    the invalid epiweeks
+  if "count" is True, return the above paired with the number of valid
+    epiweeks
+  """
+  return MMWR.validate(epiweeks, failures=failures, count=count)
+
+
+def epiweek_to_ordinal(epiweek):
+  """
+  return the number of weeks between the first epiweek of `FIRST_YEAR` and
+  the given epiweek
+  """
+  return MMWR.week_to_ordinal(epiweek)
+
+
+def ordinal_to_epiweek(ordinal):
+  """ return the epiweek having the given ordinal """
+  return MMWR.ordinal_to_week(ordinal)
 
 
 def add_epiweeks(epiweek, i):
   """ return the epiweek plus (or minus) the number of weeks """
-  check_epiweek(epiweek)
-  year, week = split_epiweek(epiweek)
-  while i > 0:
-    weeks_in_year = get_num_weeks(year)
-    dw = min(i, weeks_in_year - week)
-    i -= dw
-    week += dw
-    if i > 0 and week == weeks_in_year:
-      i -= 1
-      year += 1
-      week = 1
-  while i < 0:
-    dw = min(week - 1, -i)
-    i += dw
-    week -= dw
-    if i < 0 and week == 1:
-      i += 1
-      year -= 1
-      week = get_num_weeks(year)
-  return join_epiweek(year, week)
+  return ordinal_to_epiweek(epiweek_to_ordinal(epiweek) + i)
 
 
 def get_season(epiweek, offseason=lambda x: (None, None)):
@@ -95,18 +117,95 @@ def get_season(epiweek, offseason=lambda x: (None, None)):
 
 def delta_epiweeks(ew1, ew2):
   """ return the number of weeks between the two epiweeks """
-  check_epiweek(ew1, ew2)
-  y1, w1 = split_epiweek(ew1)
-  y2, w2 = split_epiweek(ew2)
-  num = 0
-  while y2 > y1:
-    num += get_num_weeks(y2 - 1)
-    y2 -= 1
-  while y2 < y1:
-    num -= get_num_weeks(y2)
-    y2 += 1
-  num += w2 - w1
-  return num
+  return epiweek_to_ordinal(ew2) - epiweek_to_ordinal(ew1)
+
+
+class EpiweekRange:
+  """
+  an immutable sequence of epiweeks which behaves like Python's built-in
+  "range" object
+  exactly one of "stop" and "num" must be specified
+  "stop" is exclusive unless otherwise specified with the "inclusive"
+    parameter, and a negative "num" counts down from "start"
+  length, membership, indexing, slicing, and reversal are constant-time and
+    don't require iterating over the range
+  """
+
+  def __init__(self, start, stop=None, inclusive=False, num=None):
+    if (stop is None) == (num is None):
+      raise Exception('Exactly one of "stop" and "num" must be specified')
+    if num is None:
+      num = delta_epiweeks(start, stop)
+      if inclusive:
+        if stop >= start:
+          num += 1
+        else:
+          num -= 1
+    first = epiweek_to_ordinal(start)
+    step = 1 if num >= 0 else -1
+    self._ordinals = range(first, first + num, step)
+
+  @staticmethod
+  def _from_ordinals(ordinals):
+    """ return an EpiweekRange over the given range of ordinals """
+    result = EpiweekRange.__new__(EpiweekRange)
+    result._ordinals = ordinals
+    return result
+
+  @property
+  def step(self):
+    """ the number of weeks between adjacent epiweeks in the range """
+    return self._ordinals.step
+
+  def _contains_ordinal(self, epiweek):
+    """ return the epiweek's ordinal if it's in the range, otherwise None """
+    try:
+      ordinal = epiweek_to_ordinal(epiweek)
+    except Exception:
+      return None
+    return ordinal if ordinal in self._ordinals else None
+
+  def __len__(self):
+    return len(self._ordinals)
+
+  def __iter__(self):
+    return map(ordinal_to_epiweek, self._ordinals)
+
+  def __reversed__(self):
+    return map(ordinal_to_epiweek, reversed(self._ordinals))
+
+  def __contains__(self, epiweek):
+    return self._contains_ordinal(epiweek) is not None
+
+  def __getitem__(self, i):
+    if isinstance(i, slice):
+      return EpiweekRange._from_ordinals(self._ordinals[i])
+    return ordinal_to_epiweek(self._ordinals[i])
+
+  def __eq__(self, other):
+    if not isinstance(other, EpiweekRange):
+      return NotImplemented
+    return self._ordinals == other._ordinals
+
+  def __hash__(self):
+    return hash(self._ordinals)
+
+  def __repr__(self):
+    if not self:
+      return 'EpiweekRange([])'
+    args = (self[0], self[-1], self.step)
+    return 'EpiweekRange(%d..%d, step=%d)' % args
+
+  def index(self, epiweek):
+    """ return the position of the epiweek in the range """
+    ordinal = self._contains_ordinal(epiweek)
+    if ordinal is None:
+      raise ValueError('epiweek not in range: epiweek=%r' % (epiweek,))
+    return self._ordinals.index(ordinal)
+
+  def count(self, epiweek):
+    """ return the number of times (0 or 1) the epiweek occurs in the range """
+    return int(epiweek in self)
 
 
 def range_epiweeks(start, stop=None, inclusive=False, num=None):
@@ -115,21 +214,53 @@ def range_epiweeks(start, stop=None, inclusive=False, num=None):
   exactly one of "stop" and "num" must be specified
   like Python's built-in "(x)range" function, "stop" is exclusive unless
     otherwise specified with the "inclusive" parameter
+  see EpiweekRange for a sequence supporting length, membership, and slicing
   """
-  if (stop is None) == (num is None):
-    raise Exception('Exactly one of "stop" and "num" must be specified')
-  if num is None:
-    num = delta_epiweeks(start, stop)
-    if inclusive:
-      if stop >= start:
-        num += 1
-      else:
-        num -= 1
-  while num > 0:
-    yield start
-    num -= 1
-    start = add_epiweeks(start, 1)
-  while num < 0:
-    yield start
-    num += 1
-    start = add_epiweeks(start, -1)
+  yield from EpiweekRange(start, stop=stop, inclusive=inclusive, num=num)
+
+
+def partition_epiweeks(
+    start, stop, num_chunks, inclusive=False, cost=None, seasons=False):
+  """
+  split an ascending range of epiweeks into at most "num_chunks" contiguous,
+  non-empty EpiweekRange chunks of roughly equal total cost
+  "stop" is exclusive unless otherwise specified with the "inclusive"
+    parameter
+  "cost", if given, is a function returning the non-negative cost of an
+    epiweek; by default, every epiweek has the same cost
+  if "seasons" is True, chunks only start at the beginning of a flu season
+    (see get_season), other than the first chunk
+  the chunks are picklable, so they can be passed to the workers of a
+    "concurrent.futures" executor, for example
+  """
+  if num_chunks < 1:
+    raise Exception('num_chunks must be positive')
+  epiweeks = EpiweekRange(start, stop=stop, inclusive=inclusive)
+  if epiweeks.step != 1:
+    raise Exception('expected an ascending range of epiweeks')
+  if cost is None:
+    totals = range(len(epiweeks) + 1)
+  else:
+    totals = list(itertools.accumulate(map(cost, epiweeks), initial=0))
+  # positions where a chunk may start, other than position 0
+  if seasons:
+    cuts = [
+      i for i, ew in enumerate(epiweeks) if i and get_season(ew)[0] == ew
+    ]
+  else:
+    cuts = range(1, len(epiweeks))
+  cut_totals = [totals[i] for i in cuts]
+  # cut where the running total is nearest each multiple of total / num_chunks
+  positions = [0]
+  for k in range(1, num_chunks):
+    target = totals[-1] * k / num_chunks
+    j = bisect.bisect_left(cut_totals, target)
+    if j == len(cuts) or (
+        j > 0 and target - cut_totals[j - 1] <= cut_totals[j] - target):
+      j -= 1
+    if j >= 0 and cuts[j] > positions[-1]:
+      positions.append(cuts[j])
+  positions.append(len(epiweeks))
+  return [
+    epiweeks[a:b] for a, b in zip(positions[:-1], positions[1:]) if a < b
+  ]
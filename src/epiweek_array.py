@@ -0,0 +1,319 @@
+"""
+===============
+=== Purpose ===
+===============
+
+Vectorized epiweek arithmetic over NumPy arrays.
+
+The functions in this file mirror those in epiweek.py, but they take and
+return arrays of epiweeks (or years, weeks, and ordinals) instead of scalars.
+Scalar arguments are accepted wherever an array is, and are broadcast in the
+usual NumPy way. As in epiweek.py, any epiweek in year 1 or later is valid.
+
+NumPy is only required by this file. Importing epiweek.py does not require it.
+
+Epiweek-indexed data can also be reshaped into a dense matrix with one row per
+flu season and one column per week of the season (see `to_season_matrix`).
+Columns are aligned to the calendar: column 0 is always week 40, and column 13
+is always week 53, which is left as `fill` in seasons without a week 53.
+
+Backfill grids, i.e. every (issue, epiweek, lag) triple over a range of
+epiweeks, are generated directly from ordinals (see `iter_backfill_grid`).
+
+
+=================
+=== Changelog ===
+=================
+
+2026-10-17
+  * epiweeks are computed for any year, not just [1900, 2100)
+  + backfill grids
+  + season matrix transform and its inverse
+  + initial version
+"""
+
+# third party
+import numpy as np
+
+# first party
+import delphi.utils.epiweek as utils_epiweek
+from delphi.utils.epiweek import FIRST_YEAR
+from delphi.utils.weekcalendar import MMWR
+
+
+# number of weeks in a 400-year Gregorian cycle
+_WEEKS_PER_400_YEARS = 20871
+
+
+def _get_first_day(years):
+  """ return the day index of the first day of epiweek 1 of each year """
+  # same as WeekCalendar.get_first_day, for any number of years at once
+  y = np.asarray(years, dtype=np.int64) - 1
+  day = y * 365 + y // 4 - y // 100 + y // 400 + MMWR.first_week_day - 1
+  # day 0 is a Monday
+  return day - (day + 1 - MMWR.week_start) % 7
+
+
+# first day of epiweek 1 of `FIRST_YEAR`, which has ordinal 0
+_FIRST_DAY = int(_get_first_day(FIRST_YEAR))
+
+
+def split_epiweek(epiweeks):
+  """ return a (years, weeks) pair of arrays from these epiweeks """
+  epiweeks = np.asarray(epiweeks)
+  return (epiweeks // 100, epiweeks % 100)
+
+
+def join_epiweek(years, weeks):
+  """ return an array of epiweeks from the (years, weeks) arrays """
+  return np.asarray(years) * 100 + np.asarray(weeks)
+
+
+def _compute_num_weeks(years):
+  """ return the number of epiweeks in each year, without checking them """
+  return (_get_first_day(years + 1) - _get_first_day(years)) // 7
+
+
+def check_epiweek(epiweeks):
+  """ return a boolean mask which is True where the epiweek is valid """
+  years, weeks = split_epiweek(epiweeks)
+  num_weeks = _compute_num_weeks(years)
+  return (years >= 1) & (weeks >= 1) & (weeks <= num_weeks)
+
+
+def get_num_weeks(years):
+  """ return the number of epiweeks in each year """
+  years = np.asarray(years)
+  if np.any(years < 1):
+    raise Exception('not sure how many epiweeks')
+  return _compute_num_weeks(years)
+
+
+def epiweek_to_ordinal(epiweeks):
+  """ return the ordinal (see epiweek.epiweek_to_ordinal) of each epiweek """
+  if not np.all(check_epiweek(epiweeks)):
+    raise Exception('invalid epiweek')
+  years, weeks = split_epiweek(epiweeks)
+  return (_get_first_day(years) - _FIRST_DAY) // 7 + weeks - 1
+
+
+def ordinal_to_epiweek(ordinals):
+  """ return the epiweek having each of the given ordinals """
+  ordinals = np.asarray(ordinals, dtype=np.int64)
+  days = _FIRST_DAY + ordinals * 7
+  # estimate the year from the average year length, then correct it
+  years = FIRST_YEAR + (ordinals * 400) // _WEEKS_PER_400_YEARS
+  while True:
+    early = _get_first_day(years) > days
+    late = _get_first_day(years + 1) <= days
+    if not np.any(early | late):
+      break
+    years = years - early + late
+  if np.any(years < 1):
+    raise Exception('ordinal out of range')
+  return join_epiweek(years, (days - _get_first_day(years)) // 7 + 1)
+
+
+def add_epiweeks(epiweeks, i):
+  """ return the epiweeks plus (or minus) the number(s) of weeks """
+  return ordinal_to_epiweek(epiweek_to_ordinal(epiweeks) + np.asarray(i))
+
+
+def delta_epiweeks(ew1, ew2):
+  """ return the number of weeks between each pair of epiweeks """
+  return epiweek_to_ordinal(ew2) - epiweek_to_ordinal(ew1)
+
+
+def get_season(epiweeks, fill=0):
+  """
+  return the epiweek ranges of the flu seasons containing the epiweeks as a
+  (starts, ends) pair of arrays
+
+  epiweeks which are not in any season (weeks 21 through 39) are assigned the
+  value `fill` in both arrays
+  """
+  if not np.all(check_epiweek(epiweeks)):
+    raise Exception('invalid epiweek')
+  years, weeks = split_epiweek(epiweeks)
+  # the season starts in the previous year for weeks early in the year
+  first_year = years - (weeks <= 20)
+  in_season = (weeks <= 20) | (weeks >= 40)
+  starts = np.where(in_season, join_epiweek(first_year, 40), fill)
+  ends = np.where(in_season, join_epiweek(first_year + 1, 20), fill)
+  return (starts, ends)
+
+
+# number of columns in a season matrix: weeks 40 through 53, then 1 through 20
+SEASON_COLUMNS = 34
+
+
+def get_season_column(epiweeks, seasons):
+  """
+  return the column of each epiweek within the season starting in week 40 of
+  the given year(s)
+
+  weeks 40 through 53 of the first year are columns 0 through 13, and weeks of
+  the following year are columns 14 onward; weeks before week 40 of the first
+  year have negative columns
+  """
+  years, weeks = split_epiweek(epiweeks)
+  return np.where(years > seasons, weeks + 13, weeks - 40)
+
+
+def season_column_to_epiweek(seasons, columns):
+  """
+  return the epiweek at each column of the given season(s), which is the
+  inverse of `get_season_column`
+
+  the result is not necessarily valid; column 13 is week 53 even in years that
+  have only 52 weeks
+  """
+  seasons, columns = np.asarray(seasons), np.asarray(columns)
+  return np.where(
+    columns < 14,
+    join_epiweek(seasons, columns + 40),
+    join_epiweek(seasons + 1, columns - 13),
+  )
+
+
+def to_season_matrix(
+    epiweeks, values, offseason=lambda x: (None, None), fill=np.nan):
+  """
+  return epiweek-indexed values as a (seasons, columns, matrix) tuple, where
+  `matrix[i, j]` is the value for column `columns[j]` (see
+  `get_season_column`) of the season starting in year `seasons[i]`
+
+  seasons are contiguous, from the earliest to the latest season present, and
+  there are SEASON_COLUMNS columns, numbered from 0, unless the off-season is
+  included; cells without a value are set to `fill`
+
+  `values` has one entry (or row) per epiweek; any trailing dimensions are
+  kept, so the matrix for values of shape (n, k) has shape (seasons, columns,
+  k); if an epiweek is repeated, its last value is used
+
+  epiweeks not in any season (weeks 21 through 39) are handled as in
+  epiweek.get_season: `offseason` is called with each such epiweek, and should
+  return either (None, None), in which case the value is dropped, or the range
+  of the season which the value belongs to, in which case columns are added to
+  that end of the matrix
+  """
+  epiweeks = np.asarray(epiweeks)
+  values = np.asarray(values)
+  if epiweeks.ndim != 1 or len(values) != len(epiweeks):
+    raise Exception('expected one value per epiweek')
+  starts, _ = get_season(epiweeks, fill=0)
+  keep = starts != 0
+  for i in np.flatnonzero(~keep):
+    start, _ = offseason(int(epiweeks[i]))
+    if start is not None:
+      if utils_epiweek.split_epiweek(start)[1] != 40:
+        raise Exception('invalid season start: epiweek=%d' % start)
+      starts[i] = start
+      keep[i] = True
+  epiweeks, values, starts = epiweeks[keep], values[keep], starts[keep]
+  years = starts // 100
+  cols = get_season_column(epiweeks, years)
+  if len(epiweeks):
+    seasons = np.arange(years.min(), years.max() + 1)
+    columns = np.arange(min(cols.min(), 0), max(cols.max() + 1, SEASON_COLUMNS))
+  else:
+    seasons = np.arange(0)
+    columns = np.arange(SEASON_COLUMNS)
+  shape = (len(seasons), len(columns)) + values.shape[1:]
+  matrix = np.full(shape, fill, dtype=np.result_type(values, fill))
+  if len(epiweeks):
+    matrix[years - seasons[0], cols - columns[0]] = values
+  return (seasons, columns, matrix)
+
+
+def from_season_matrix(seasons, columns, matrix):
+  """
+  return the cells of a season matrix (see `to_season_matrix`) as an
+  (epiweeks, values) pair of arrays, ordered by season and then by column
+
+  cells which don't correspond to an epiweek, like week 53 in years having
+  only 52 weeks, are omitted; cells equal to the fill value are not
+  """
+  seasons, columns = np.asarray(seasons), np.asarray(columns)
+  matrix = np.asarray(matrix)
+  if matrix.shape[:2] != (len(seasons), len(columns)):
+    raise Exception('matrix shape does not match seasons and columns')
+  epiweeks = season_column_to_epiweek(seasons[:, None], columns[None, :])
+  valid = check_epiweek(epiweeks)
+  return (epiweeks[valid], matrix[valid])
+
+
+def _get_backfill_counts(issues, first, max_lag, same_season):
+  """ return the number of epiweeks reported by each issue (an ordinal) """
+  # earliest epiweek (as an ordinal) reported by each issue
+  earliest = np.full(len(issues), first, dtype=np.int64)
+  if max_lag is not None:
+    earliest = np.maximum(earliest, issues - max_lag)
+  counts = issues - earliest + 1
+  if same_season:
+    starts, _ = get_season(ordinal_to_epiweek(issues), fill=0)
+    in_season = starts != 0
+    first_weeks = np.where(in_season, starts, FIRST_YEAR * 100 + 1)
+    season_first = epiweek_to_ordinal(first_weeks)
+    counts = np.where(in_season, np.minimum(counts, issues - season_first + 1), 0)
+  return np.maximum(counts, 0)
+
+
+def _get_backfill_rows(issues, counts):
+  """ return the (issue, epiweek, lag) arrays for the given issue ordinals """
+  total = int(counts.sum())
+  # position of each row within its issue's group
+  group_starts = np.cumsum(counts) - counts
+  positions = np.arange(total) - np.repeat(group_starts, counts)
+  # epiweeks are in ascending order, so lags are in descending order
+  lags = np.repeat(counts, counts) - 1 - positions
+  issues = np.repeat(issues, counts)
+  return (
+    ordinal_to_epiweek(issues).astype(np.int32),
+    ordinal_to_epiweek(issues - lags).astype(np.int32),
+    lags.astype(np.int32),
+  )
+
+
+def iter_backfill_grid(
+    start, stop, max_lag=None, same_season=False, chunk_size=None):
+  """
+  iterate over every (issue, epiweek, lag) triple where the issue is in
+  [start, stop), the epiweek is in [start, issue], and lag is the number of
+  weeks between them, as chunks of (issues, epiweeks, lags) int32 arrays
+
+  rows are ordered by issue, then by epiweek
+  if "max_lag" is given, rows with a greater lag are omitted
+  if "same_season" is True, only rows where the issue and the epiweek are in
+    the same flu season (see get_season) are included
+  if "chunk_size" is given, each chunk has at most that many rows, unless a
+    single issue has more; otherwise the whole grid is a single chunk
+  """
+  if max_lag is not None and max_lag < 0:
+    raise Exception('max_lag must be non-negative')
+  if chunk_size is not None and chunk_size < 1:
+    raise Exception('chunk_size must be positive')
+  first = int(epiweek_to_ordinal(start))
+  last = int(epiweek_to_ordinal(stop))
+  issues = np.arange(first, max(first, last), dtype=np.int64)
+  counts = _get_backfill_counts(issues, first, max_lag, same_season)
+  if chunk_size is None:
+    yield _get_backfill_rows(issues, counts)
+    return
+  ends = np.cumsum(counts)
+  i = 0
+  while i < len(issues):
+    # take as many issues as fit in the chunk, but always at least one
+    offset = ends[i - 1] if i else 0
+    j = max(int(np.searchsorted(ends, offset + chunk_size, side='right')), i + 1)
+    if ends[j - 1] > offset:
+      yield _get_backfill_rows(issues[i:j], counts[i:j])
+    i = j
+
+
+def get_backfill_grid(start, stop, max_lag=None, same_season=False):
+  """
+  return every (issue, epiweek, lag) triple as a single chunk (see
+  `iter_backfill_grid`)
+  """
+  return next(iter_backfill_grid(start, stop, max_lag, same_season))
@@ -0,0 +1,150 @@
+"""
+===============
+=== Purpose ===
+===============
+
+Rolling up epiweek-indexed values to months, quarters, and flu seasons.
+
+An epiweek can straddle two months (or two quarters), so each epiweek is
+mapped to the periods it overlaps, along with the fraction of its seven days
+that falls in each. The mappings are derived from the EpiDate calendar and
+precomputed once per resolution for every epiweek in [FIRST_YEAR, LAST_YEAR),
+as defined in epiweek.py.
+
+Periods are represented as ints:
+  month: year * 100 + month, e.g. 201711
+  quarter: year * 10 + quarter, e.g. 20174
+  season: the first epiweek of the flu season (see epiweek.get_season), e.g.
+    201740; off-season epiweeks (weeks 21 through 39) have no season
+
+Typical usage:
+````
+epiweeks = np.array([201743, 201744, 201745])
+months, totals = rollup(epiweeks, np.array([7, 14, 7]), 'month')
+# months = [201710, 201711], totals = [13.0, 15.0]
+````
+
+NumPy is required by this file.
+
+
+=================
+=== Changelog ===
+=================
+
+2026-10-17
+  + initial version
+"""
+
+# standard library
+import functools
+
+# third party
+import numpy as np
+
+# first party
+import delphi.utils.epiweek as utils_epiweek
+import delphi.utils.epiweek_array as utils_epiweek_array
+from delphi.utils.epidate_array import EpiDateArray
+from delphi.utils.epiweek import LAST_YEAR
+
+
+RESOLUTIONS = ('month', 'quarter', 'season')
+
+
+def _get_periods(epiweeks, resolution):
+  """Return a (7, n) array of the period containing each day of each epiweek."""
+  if resolution == 'season':
+    starts, _ = utils_epiweek_array.get_season(epiweeks, fill=0)
+    return np.broadcast_to(starts, (7, len(epiweeks)))
+  first_days = EpiDateArray.from_epiweek(epiweeks).add_days(-3)
+  periods = []
+  for i in range(7):
+    dates = first_days.add_days(i)
+    years, months = dates.get_year(), dates.get_month()
+    if resolution == 'month':
+      periods.append(years * 100 + months)
+    else:
+      periods.append(years * 10 + (months + 2) // 3)
+  return np.array(periods)
+
+
+class PeriodTable:
+  """
+  The periods overlapped by every epiweek, and the fraction of the epiweek's
+  days in each.
+
+  Rows are stored in epiweek order; the rows for the epiweek with ordinal `i`
+  (see epiweek.epiweek_to_ordinal) are `offsets[i]` through `offsets[i + 1]`.
+  """
+
+  def __init__(self, resolution):
+    if resolution not in RESOLUTIONS:
+      raise Exception('unknown resolution [%s]' % resolution)
+    self.resolution = resolution
+    stop = utils_epiweek.epiweek_to_ordinal(LAST_YEAR * 100 + 1)
+    ordinals = np.arange(stop)
+    epiweeks = utils_epiweek_array.ordinal_to_epiweek(ordinals)
+    periods = _get_periods(epiweeks, resolution).T
+    # find runs of days in the same period, which never span two epiweeks
+    is_new = np.ones(periods.shape, dtype=bool)
+    is_new[:, 1:] = periods[:, 1:] != periods[:, :-1]
+    starts = np.flatnonzero(is_new)
+    lengths = np.diff(np.append(starts, periods.size))
+    keep = periods.ravel()[starts] != 0
+    starts, lengths = starts[keep], lengths[keep]
+    self.periods = periods.ravel()[starts]
+    self.fractions = lengths / 7
+    days = starts // 7
+    self.offsets = np.zeros(len(ordinals) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(days, minlength=len(ordinals)), out=self.offsets[1:])
+
+  def get_overlaps(self, epiweek):
+    """Return a list of (period, fraction) pairs for the epiweek."""
+    i = int(utils_epiweek_array.epiweek_to_ordinal(epiweek))
+    if not 0 <= i < len(self.offsets) - 1:
+      raise Exception('epiweek out of range of the table')
+    rows = slice(self.offsets[i], self.offsets[i + 1])
+    return list(zip(self.periods[rows].tolist(), self.fractions[rows].tolist()))
+
+  def lookup(self, epiweeks):
+    """
+    Return the rows for an array of epiweeks as a (positions, periods,
+    fractions) tuple of arrays, where `positions` is the index of the epiweek
+    in `epiweeks` that each row belongs to.
+    """
+    ordinals = np.ravel(utils_epiweek_array.epiweek_to_ordinal(epiweeks))
+    if np.any((ordinals < 0) | (ordinals >= len(self.offsets) - 1)):
+      raise Exception('epiweek out of range of the table')
+    starts = self.offsets[ordinals]
+    counts = self.offsets[ordinals + 1] - starts
+    positions = np.repeat(np.arange(len(ordinals)), counts)
+    rows = np.repeat(starts - (np.cumsum(counts) - counts), counts)
+    rows += np.arange(len(rows))
+    return (positions, self.periods[rows], self.fractions[rows])
+
+
+@functools.lru_cache(maxsize=None)
+def get_table(resolution):
+  """Return the shared PeriodTable for the resolution, building it if needed."""
+  return PeriodTable(resolution)
+
+
+def rollup(epiweeks, values, resolution='month'):
+  """
+  Return the sums of epiweek values over periods as a (periods, totals) pair
+  of arrays, in order of period.
+
+  The value of an epiweek which straddles two periods is split between them
+  in proportion to the number of days in each. `values` has one entry (or
+  row) per epiweek; any trailing dimensions are kept. Epiweeks in no period
+  (off-season epiweeks, at the season resolution) are ignored.
+  """
+  values = np.asarray(values)
+  if len(values) != len(np.ravel(epiweeks)):
+    raise Exception('expected one value per epiweek')
+  positions, periods, fractions = get_table(resolution).lookup(epiweeks)
+  unique, rows = np.unique(periods, return_inverse=True)
+  weights = fractions.reshape((-1,) + (1,) * (values.ndim - 1))
+  totals = np.zeros((len(unique),) + values.shape[1:])
+  np.add.at(totals, rows, values[positions] * weights)
+  return (unique, totals)
@@ -0,0 +1,220 @@
+"""
+===============
+=== Purpose ===
+===============
+
+A container for values indexed by consecutive epiweeks.
+
+An EpiweekSeries stores its values in a contiguous list, together with the
+ordinal (see epiweek.epiweek_to_ordinal) of its first epiweek. Looking up the
+value for an epiweek is therefore a subtraction and a list index, rather than
+a dict lookup, and no per-epiweek keys are stored.
+
+Missing values are represented by None. Series can be converted to and from
+the `{epiweek: value}` dicts used elsewhere.
+
+Typical usage:
+````
+a = EpiweekSeries.from_dict({201752: 1.0, 201801: 2.0})
+b = EpiweekSeries(201801, [5.0, 6.0])
+for epiweek, (x, y) in EpiweekSeries.join(a, b.lag(1)).items():
+  print(epiweek, x, y)
+````
+
+
+=================
+=== Changelog ===
+=================
+
+2026-10-17
+  + initial version
+"""
+
+# first party
+from delphi.utils.epiweek import EpiweekRange
+from delphi.utils.epiweek import epiweek_to_ordinal, ordinal_to_epiweek
+
+
+class EpiweekSeries:
+  """
+  Values for a contiguous range of epiweeks.
+
+  Series returned by `lag` and `lead` share the value list of the original.
+  """
+
+  def __init__(self, start, values):
+    self._ordinal = epiweek_to_ordinal(start)
+    self.values = list(values)
+
+  @staticmethod
+  def _from_ordinal(ordinal, values):
+    """Return a series over the given list, without copying it."""
+    series = EpiweekSeries.__new__(EpiweekSeries)
+    series._ordinal = ordinal
+    series.values = values
+    return series
+
+  @property
+  def start(self):
+    """The first epiweek of the series."""
+    return ordinal_to_epiweek(self._ordinal)
+
+  @property
+  def stop(self):
+    """The epiweek after the last epiweek of the series."""
+    return ordinal_to_epiweek(self._ordinal + len(self.values))
+
+  def __len__(self):
+    return len(self.values)
+
+  def __eq__(self, other):
+    if not isinstance(other, EpiweekSeries):
+      return NotImplemented
+    return self._ordinal == other._ordinal and self.values == other.values
+
+  def __repr__(self):
+    return 'EpiweekSeries(%d, %r)' % (self.start, self.values)
+
+  def _get_position(self, epiweek):
+    """Return the epiweek's position in the list, or None if not present."""
+    try:
+      i = epiweek_to_ordinal(epiweek) - self._ordinal
+    except Exception:
+      return None
+    return i if 0 <= i < len(self.values) else None
+
+  def __contains__(self, epiweek):
+    return self._get_position(epiweek) is not None
+
+  def __getitem__(self, epiweek):
+    i = self._get_position(epiweek)
+    if i is None:
+      raise KeyError(epiweek)
+    return self.values[i]
+
+  def get(self, epiweek, default=None):
+    """Return the value for the epiweek, or `default` if it's not present."""
+    i = self._get_position(epiweek)
+    return default if i is None else self.values[i]
+
+  def epiweeks(self):
+    """Return the epiweeks of the series as an EpiweekRange."""
+    return EpiweekRange(self.start, num=len(self.values))
+
+  def items(self):
+    """Return an iterator of (epiweek, value) pairs."""
+    return zip(self.epiweeks(), self.values)
+
+  def lag(self, num):
+    """
+    Return the series shifted later by `num` weeks, so that the value for
+    each epiweek is this series' value `num` weeks earlier.
+    """
+    return EpiweekSeries._from_ordinal(self._ordinal + num, self.values)
+
+  def lead(self, num):
+    """Return the series shifted earlier by `num` weeks."""
+    return self.lag(-num)
+
+  def _reindex(self, ordinal, num, fill):
+    """Return the values over `num` weeks starting at the given ordinal."""
+    # overlap of [ordinal, ordinal + num) and this series, in list positions
+    begin = max(ordinal - self._ordinal, 0)
+    end = min(ordinal + num - self._ordinal, len(self.values))
+    if begin >= end:
+      return [fill] * num
+    before = self._ordinal + begin - ordinal
+    after = num - before - (end - begin)
+    return [fill] * before + self.values[begin:end] + [fill] * after
+
+  def reindex(self, epiweeks, fill=None):
+    """
+    Return a series over the given ascending EpiweekRange, using `fill` where
+    this series has no value.
+    """
+    if len(epiweeks) and epiweeks.step != 1:
+      raise Exception('expected consecutive, ascending epiweeks')
+    ordinal = epiweek_to_ordinal(epiweeks[0]) if len(epiweeks) else self._ordinal
+    values = self._reindex(ordinal, len(epiweeks), fill)
+    return EpiweekSeries._from_ordinal(ordinal, values)
+
+  def fill(self, value=None, forward=False):
+    """
+    Return a series where missing (None) values are replaced with `value`, or
+    if `forward` is True, with the most recent non-missing value.
+    """
+    values = []
+    last = value
+    for v in self.values:
+      if v is None:
+        v = last
+      elif forward:
+        last = v
+      values.append(v)
+    return EpiweekSeries._from_ordinal(self._ordinal, values)
+
+  def rolling(self, window, func):
+    """
+    Return a series of `func` applied to each window of `window` consecutive
+    values. The result for each epiweek covers the window ending at that
+    epiweek, so the first `window - 1` epiweeks are omitted.
+    """
+    if window < 1:
+      raise Exception('window must be positive')
+    values = self.values
+    results = [func(values[i - window:i]) for i in range(window, len(values) + 1)]
+    return EpiweekSeries._from_ordinal(self._ordinal + window - 1, results)
+
+  def to_dict(self, missing=False):
+    """
+    Return a `{epiweek: value}` dict, omitting missing (None) values unless
+    `missing` is True.
+    """
+    return {ew: v for ew, v in self.items() if missing or v is not None}
+
+  @staticmethod
+  def from_dict(values, fill=None):
+    """
+    Return a series spanning the epiweeks of a `{epiweek: value}` dict, using
+    `fill` for epiweeks not in the dict.
+    """
+    if not values:
+      raise Exception('cannot build a series from an empty dict')
+    ordinals = {epiweek_to_ordinal(ew): v for ew, v in values.items()}
+    first = min(ordinals)
+    result = [fill] * (max(ordinals) - first + 1)
+    for ordinal, v in ordinals.items():
+      result[ordinal - first] = v
+    return EpiweekSeries._from_ordinal(first, result)
+
+  @staticmethod
+  def align(*series, fill=None, inner=False):
+    """
+    Return the given series reindexed to a common range of epiweeks, which is
+    the union of their ranges (or the intersection, if `inner` is True).
+    """
+    if not series:
+      return []
+    starts = [s._ordinal for s in series]
+    stops = [s._ordinal + len(s) for s in series]
+    if inner:
+      first, last = max(starts), min(stops)
+    else:
+      first, last = min(starts), max(stops)
+    num = max(last - first, 0)
+    return [
+      EpiweekSeries._from_ordinal(first, s._reindex(first, num, fill))
+      for s in series
+    ]
+
+  @staticmethod
+  def join(*series, fill=None, inner=False):
+    """
+    Return a single series of tuples, one value from each of the given series,
+    over their aligned range of epiweeks (see `align`).
+    """
+    aligned = EpiweekSeries.align(*series, fill=fill, inner=inner)
+    if not aligned:
+      raise Exception('expected at least one series')
+    values = list(zip(*(s.values for s in aligned)))
+    return EpiweekSeries._from_ordinal(aligned[0]._ordinal, values)
@@ -12,12 +12,184 @@ from extractor import Extractor
 filename, destdir = 'somefile.tgz', 'some/dest/str'
 Extractor.extract(filename, destdir)
 ````
+
+Large tar files can be extracted in a single streaming pass, which reads (and
+decompresses) the archive only once:
+````
+Extractor.extract(filename, destdir, stream=True)
+````
+
+The members of zip files are compressed independently, so they can be
+extracted by a pool of worker processes:
+````
+Extractor.extract('somefile.zip', destdir, workers=8)
+````
+
+Archives which are repeatedly extracted into the same directory can be
+extracted incrementally. A manifest in the destination directory records each
+extracted member, and members which haven't changed since they were last
+extracted (and whose files haven't been modified) are skipped. An interrupted
+extraction resumes where it left off, and an archive which hasn't changed at
+all is skipped entirely:
+````
+Extractor.extract(filename, destdir, incremental=True)
+````
+
+Members can also be read directly from an archive, without writing them to
+disk:
+````
+for name, f in Extractor.iter_members('somefile.tgz', pattern='*.csv'):
+  process(name, f.read())
+````
+
+To repeatedly pull a few members out of a large tar file, first build an index
+of its members, which is saved alongside the archive. Selected members can
+then be extracted by seeking straight to them. For gzipped tar files, the
+index can also record checkpoints from which decompression can start, but
+only at the boundaries between gzip members (as written by bgzip, or by
+concatenating gzip files):
+````
+Extractor.build_index('somefile.tar.gz', checkpoints=True)
+Extractor.extract_members('somefile.tar.gz', destdir, ['data/pa.csv'])
+````
 """
 
 # standard library
 import argparse
+import concurrent.futures
+import fnmatch
+import gzip
+import hashlib
+import heapq
+import json
+import os
 import tarfile
+import tempfile
 import zipfile
+import zlib
+
+
+class _Manifest:
+  """
+  A record of the members extracted into a directory, stored in that
+  directory as one JSON object per line.
+
+  The first line holds the fingerprint of the archive being extracted. Each
+  following line describes one extracted file: the name, size, modification
+  time, and CRC-32 of its member, and the size and modification time of the
+  file as written. Later lines supersede earlier ones. A final line marks the
+  extraction as complete.
+  """
+
+  NAME = '.extractor-manifest'
+
+  def __init__(self, destdir):
+    self.destdir = destdir
+    self.filename = os.path.join(destdir, _Manifest.NAME)
+    self.fingerprint = None
+    self.complete = False
+    self.entries = {}
+    self.file = None
+    if os.path.exists(self.filename):
+      self._read()
+
+  def _read(self):
+    with open(self.filename) as f:
+      for line in f:
+        try:
+          obj = json.loads(line)
+        except ValueError:
+          # the last line may be partial if extraction was interrupted
+          break
+        if 'fingerprint' in obj:
+          self.fingerprint = obj['fingerprint']
+        elif 'complete' in obj:
+          self.complete = True
+        else:
+          self.entries[obj['name']] = obj
+
+  def _get_stat(self, name):
+    """Return the [size, mtime_ns] of the extracted file, or None."""
+    try:
+      stat = os.stat(os.path.join(self.destdir, name))
+    except OSError:
+      return None
+    return [stat.st_size, stat.st_mtime_ns]
+
+  def is_intact(self, name):
+    """Return whether the file is as it was when it was extracted."""
+    return self._get_stat(name) == self.entries[name]['stat']
+
+  def is_unchanged(self, fingerprint):
+    """Return whether the archive was completely extracted and is intact."""
+    if not self.complete or self.fingerprint != fingerprint:
+      return False
+    return all(self.is_intact(name) for name in self.entries)
+
+  def get_intact(self, name):
+    """Return the entry for the name if its file is intact, otherwise None."""
+    entry = self.entries.get(name)
+    if entry is None or not self.is_intact(name):
+      return None
+    return entry
+
+  def matches(self, name, member):
+    """Return whether the member was extracted and its file is intact."""
+    entry = self.get_intact(name)
+    return entry is not None and entry['member'] == member
+
+  def start(self, fingerprint):
+    """Start a new manifest, keeping the entries of the previous one."""
+    self.fingerprint = fingerprint
+    self.complete = False
+    self.file = open(self.filename, 'w')
+    self._write({'fingerprint': fingerprint})
+    for entry in self.entries.values():
+      self._write(entry)
+
+  def add(self, name, member):
+    """Record that the member has been extracted."""
+    entry = {'name': name, 'member': member, 'stat': self._get_stat(name)}
+    self.entries[name] = entry
+    self._write(entry)
+
+  def finish(self):
+    """Mark the extraction as complete."""
+    self.complete = True
+    self._write({'complete': True})
+
+  def close(self):
+    """Close the manifest file, if it's open."""
+    if self.file is not None:
+      self.file.close()
+      self.file = None
+
+  def _write(self, obj):
+    self.file.write(json.dumps(obj) + '\n')
+    self.file.flush()
+
+
+class _OffsetFile:
+  """
+  A read-only view of a file as if it began `shift` bytes earlier, so that a
+  stream starting partway through a tar file can be read using the tar file's
+  offsets.
+  """
+
+  def __init__(self, fileobj, shift):
+    self.fileobj = fileobj
+    self.shift = shift
+
+  def read(self, size=-1):
+    return self.fileobj.read(size)
+
+  def seek(self, offset, whence=os.SEEK_SET):
+    if whence == os.SEEK_SET:
+      offset -= self.shift
+    return self.fileobj.seek(offset, whence) + self.shift
+
+  def tell(self):
+    return self.fileobj.tell() + self.shift
 
 
 class Extractor:
@@ -45,6 +217,49 @@ class Extractor:
     tf = tarfile.open(filename)
     return tf, tf.getmembers(), check
 
+  @staticmethod
+  def _extract_tar_dir(tf, member, destdir, directories):
+    """
+    Create a directory from a tar file, leaving it writable by its owner.
+    As in TarFile.extractall, its attributes are set only after everything
+    else has been extracted (see `_set_tar_dir_attrs`), so that a read-only
+    directory can still be filled and keeps its modification time.
+    """
+    tf.extract(member, destdir, set_attrs=False)
+    path = os.path.join(destdir, member.name)
+    # the directory may already exist, e.g. from an earlier extraction
+    mode = os.stat(path).st_mode & 0o7777
+    if mode & 0o700 != 0o700:
+      os.chmod(path, mode | 0o700)
+    directories.append(member)
+
+  @staticmethod
+  def _set_tar_dir_attrs(tf, destdir, directories):
+    """Set the attributes of directories, deepest first."""
+    for member in sorted(directories, key=lambda m: m.name, reverse=True):
+      path = os.path.join(destdir, member.name)
+      try:
+        tf.chown(member, path, False)
+        tf.utime(member, path)
+        tf.chmod(member, path)
+      except tarfile.ExtractError:
+        # as in TarFile.extractall, these errors aren't fatal
+        pass
+
+  @staticmethod
+  def _extract_tar_stream(filename, destdir):
+    """Check and extract each member of a tar file in a single pass."""
+    directories = []
+    with tarfile.open(filename, 'r|*') as tf:
+      for member in tf:
+        Extractor._check_type(member)
+        Extractor._check_name(member.name)
+        if member.isdir():
+          Extractor._extract_tar_dir(tf, member, destdir, directories)
+        else:
+          tf.extract(member, destdir)
+      Extractor._set_tar_dir_attrs(tf, destdir, directories)
+
   @staticmethod
   def _open_zip(filename, destdir):
     """Open a zip file."""
@@ -52,18 +267,418 @@ class Extractor:
     return zf, zf.namelist(), Extractor._check_name
 
   @staticmethod
-  def extract(filename, destdir):
+  def _get_zip_batches(zf, num_batches, names=None):
+    """
+    Split the members of a zip file (or only the given names) into batches of
+    similar total size.
+    """
+    # when a name occurs more than once, the last member is the one extracted
+    infos = {info.filename: info for info in zf.infolist()}
+    if names is not None:
+      infos = {name: infos[name] for name in names}
+    # assign the largest remaining member to the smallest batch
+    infos = sorted(infos.values(), key=lambda i: (-i.compress_size, i.filename))
+    batches = [[] for _ in range(num_batches)]
+    heap = [(0, i) for i in range(num_batches)]
+    for info in infos:
+      size, i = heapq.heappop(heap)
+      batches[i].append(info.filename)
+      heapq.heappush(heap, (size + info.compress_size, i))
+    return [batch for batch in batches if batch]
+
+  @staticmethod
+  def _extract_zip_batch(filename, destdir, names):
+    """Extract the named members of a zip file, using a new file handle."""
+    with zipfile.ZipFile(filename) as zf:
+      for name in names:
+        zf.extract(name, destdir)
+
+  @staticmethod
+  def _extract_zip_parallel(
+      zf, filename, destdir, workers, names=None, callback=None,
+      num_batches=None):
+    """
+    Extract a zip file (or only the given names) using a pool of worker
+    processes, calling `callback` with each batch of names once it's done.
+    The members are split into `num_batches` batches, by default one per
+    worker.
+    """
+    # create directories up front so that workers don't race to create them
+    for name in set(os.path.dirname(name) for name in zf.namelist()):
+      os.makedirs(os.path.join(destdir, name), exist_ok=True)
+    batches = Extractor._get_zip_batches(zf, num_batches or workers, names)
+    with concurrent.futures.ProcessPoolExecutor(workers) as executor:
+      futures = {
+        executor.submit(Extractor._extract_zip_batch, filename, destdir, batch):
+          batch
+        for batch in batches
+      }
+      for future in concurrent.futures.as_completed(futures):
+        future.result()
+        if callback is not None:
+          callback(futures[future])
+
+  @staticmethod
+  def _get_fingerprint(filename):
+    """
+    Return a fingerprint of a file which is cheap to compute, even for large
+    archives: a hash of its size, modification and change times, and first
+    and last blocks. The times change whenever the file is rewritten, even if
+    its size and the hashed blocks don't.
+    """
+    block_size = 1 << 20
+    stat = os.stat(filename)
+    size = stat.st_size
+    header = '%d:%d:%d' % (size, stat.st_mtime_ns, stat.st_ctime_ns)
+    sha = hashlib.sha256(header.encode('ascii'))
+    with open(filename, 'rb') as f:
+      sha.update(f.read(block_size))
+      f.seek(max(size - block_size, 0))
+      sha.update(f.read(block_size))
+    return sha.hexdigest()
+
+  @staticmethod
+  def _extract_tar_member_if_changed(tf, member, destdir, compare):
+    """
+    Extract a file from a tar file which is being read as a stream, unless
+    `compare` is True and the file already on disk has the same contents.
+    Return the CRC-32 of the member's contents and whether it was written.
+    """
+    block_size = 1 << 20
+    path = os.path.join(destdir, member.name)
+    src = tf.extractfile(member)
+    crc = 0
+    # number of leading bytes which are the same as the file on disk
+    prefix = 0
+    chunk = src.read(block_size)
+    crc = zlib.crc32(chunk, crc)
+    if compare:
+      with open(path, 'rb') as existing:
+        while chunk == existing.read(len(chunk)):
+          if not chunk:
+            # the caller checked that the sizes are the same
+            return crc, False
+          prefix += len(chunk)
+          chunk = src.read(block_size)
+          crc = zlib.crc32(chunk, crc)
+    # write a new file, copying the prefix from the old one
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    f = tempfile.NamedTemporaryFile(dir=directory, delete=False)
+    try:
+      with f:
+        if prefix:
+          with open(path, 'rb') as existing:
+            remaining = prefix
+            while remaining:
+              data = existing.read(min(block_size, remaining))
+              f.write(data)
+              remaining -= len(data)
+        while chunk:
+          f.write(chunk)
+          chunk = src.read(block_size)
+          crc = zlib.crc32(chunk, crc)
+      os.replace(f.name, path)
+    except BaseException:
+      # don't leave a partial file behind if reading the member fails or
+      # extraction is interrupted
+      os.unlink(f.name)
+      raise
+    tf.chmod(member, path)
+    tf.utime(member, path)
+    return crc, True
+
+  @staticmethod
+  def _extract_tar_incremental(filename, destdir, manifest):
+    """
+    Extract the members of a tar file which have changed since they were
+    recorded in the manifest. The contents of each member are compared with
+    the file already on disk, so a file is only written if it differs.
+    """
+    directories = []
+    with tarfile.open(filename, 'r|*') as tf:
+      for member in tf:
+        Extractor._check_type(member)
+        Extractor._check_name(member.name)
+        if member.isdir():
+          Extractor._extract_tar_dir(tf, member, destdir, directories)
+          continue
+        entry = manifest.get_intact(member.name)
+        compare = entry is not None and entry['stat'][0] == member.size
+        crc, written = Extractor._extract_tar_member_if_changed(
+          tf, member, destdir, compare)
+        key = [member.size, member.mtime, crc]
+        if not written and entry['member'] != key:
+          # same contents, but the member's metadata changed
+          tf.utime(member, os.path.join(destdir, member.name))
+          written = True
+        if written:
+          manifest.add(member.name, key)
+      Extractor._set_tar_dir_attrs(tf, destdir, directories)
+
+  @staticmethod
+  def _extract_zip_incremental(filename, destdir, workers, manifest):
+    """Extract the members of a zip file which aren't in the manifest."""
+    with zipfile.ZipFile(filename) as zf:
+      for name in zf.namelist():
+        Extractor._check_name(name)
+      # when a name occurs more than once, the last member is the one extracted
+      infos = {info.filename: info for info in zf.infolist()}
+      keys = {
+        name: [info.file_size, list(info.date_time), info.CRC]
+        for name, info in infos.items()
+      }
+      names = [
+        name for name, info in infos.items()
+        if info.is_dir() or not manifest.matches(name, keys[name])
+      ]
+      def record(batch):
+        for name in batch:
+          if not infos[name].is_dir():
+            manifest.add(name, keys[name])
+      if workers > 1:
+        # use many small batches, so that progress is recorded often and an
+        # interrupted extraction loses little of it
+        Extractor._extract_zip_parallel(
+          zf, filename, destdir, workers, names, record,
+          num_batches=workers * 16)
+      else:
+        for name in names:
+          zf.extract(name, destdir)
+          record([name])
+
+  @staticmethod
+  def _extract_incremental(filename, destdir, is_tar, workers):
+    """Extract only the members which have changed since the last time."""
+    os.makedirs(destdir, exist_ok=True)
+    manifest = _Manifest(destdir)
+    fingerprint = Extractor._get_fingerprint(filename)
+    if manifest.is_unchanged(fingerprint):
+      print('  (unchanged)')
+      return
+    manifest.start(fingerprint)
+    try:
+      if is_tar:
+        Extractor._extract_tar_incremental(filename, destdir, manifest)
+      else:
+        Extractor._extract_zip_incremental(
+          filename, destdir, workers, manifest)
+      manifest.finish()
+    finally:
+      manifest.close()
+
+  @staticmethod
+  def _get_index_filename(filename):
+    """Return the name of the file holding the index of a tar file."""
+    return str(filename) + '.index.json'
+
+  @staticmethod
+  def _get_gzip_checkpoints(filename, spacing):
+    """
+    Return a list of [compressed, uncompressed] offsets of the starts of gzip
+    members, at least `spacing` uncompressed bytes apart. Anything following
+    the last gzip member, like trailing zero padding, is ignored.
+    """
+    checkpoints = [[0, 0]]
+    compressed, uncompressed = 0, 0
+    decompressor = zlib.decompressobj(wbits=31)
+    with open(filename, 'rb') as f:
+      for chunk in iter(lambda: f.read(1 << 16), b''):
+        while chunk:
+          if decompressor is None:
+            # a gzip member ended; stop unless another one starts here
+            if not b'\x1f\x8b'.startswith(chunk[:2]):
+              return checkpoints
+            decompressor = zlib.decompressobj(wbits=31)
+            if uncompressed - checkpoints[-1][1] >= spacing:
+              checkpoints.append([compressed, uncompressed])
+          uncompressed += len(decompressor.decompress(chunk))
+          if not decompressor.eof:
+            compressed += len(chunk)
+            break
+          compressed += len(chunk) - len(decompressor.unused_data)
+          chunk = decompressor.unused_data
+          decompressor = None
+    return checkpoints
+
+  @staticmethod
+  def build_index(filename, checkpoints=False, spacing=1 << 20):
+    """
+    Build an index of the files in an uncompressed or gzipped tar file, save
+    it alongside the archive, and return it. Other compression methods, like
+    bzip2 and xz, aren't supported, since they can't be seeked into cheaply.
+
+    The index maps each file's name to the offsets of its header and data
+    within the (uncompressed) tar file, and its size. If `checkpoints` is True
+    and the tar file is gzipped, the index also records where gzip members
+    start, at least `spacing` uncompressed bytes apart, so that
+    `extract_members` can start decompressing near each file. Building
+    checkpoints reads the archive a second time.
+    """
+    with open(filename, 'rb') as f:
+      is_gzip = f.read(2) == b'\x1f\x8b'
+    try:
+      tf = tarfile.open(filename, 'r:gz' if is_gzip else 'r:')
+    except tarfile.ReadError:
+      if is_gzip:
+        raise
+      msg = 'only uncompressed or gzip tar supported [%s]'
+      raise Exception(msg % str(filename))
+    members = {}
+    with tf:
+      for member in tf:
+        if member.isfile():
+          offsets = [member.offset, member.offset_data, member.size]
+          members[member.name] = offsets
+    stat = os.stat(filename)
+    index = {
+      'size': stat.st_size,
+      'mtime': stat.st_mtime_ns,
+      'compression': 'gzip' if is_gzip else 'none',
+      'members': members,
+      'checkpoints': [[0, 0]],
+    }
+    if checkpoints and is_gzip:
+      index['checkpoints'] = Extractor._get_gzip_checkpoints(filename, spacing)
+    with open(Extractor._get_index_filename(filename), 'w') as f:
+      json.dump(index, f)
+    return index
+
+  @staticmethod
+  def _load_index(filename):
+    """Return the saved index of a tar file, or None if missing or stale."""
+    try:
+      with open(Extractor._get_index_filename(filename)) as f:
+        index = json.load(f)
+    except (OSError, ValueError):
+      return None
+    stat = os.stat(filename)
+    if [index['size'], index['mtime']] != [stat.st_size, stat.st_mtime_ns]:
+      return None
+    return index
+
+  @staticmethod
+  def extract_members(filename, destdir, names):
+    """
+    Extract the named files from a tar file, seeking straight to each one
+    using the archive's index. The index is built (without checkpoints) if it
+    doesn't exist or the archive has changed since it was built.
+    """
+    index = Extractor._load_index(filename)
+    if index is None:
+      index = Extractor.build_index(filename)
+    print('extracting %s:' % filename)
+    for name in names:
+      if name not in index['members']:
+        raise Exception('member not in archive [%s]' % name)
+    with open(filename, 'rb') as raw:
+      for name in names:
+        offset = index['members'][name][0]
+        if index['compression'] == 'gzip':
+          # start decompressing from the last checkpoint before the member
+          compressed, shift = max(
+            c for c in index['checkpoints'] if c[1] <= offset)
+          raw.seek(compressed)
+          with gzip.GzipFile(fileobj=raw, mode='rb') as stream:
+            fileobj = _OffsetFile(stream, shift)
+            Extractor._extract_member_at(
+              filename, fileobj, offset, name, destdir)
+        else:
+          fileobj = _OffsetFile(raw, 0)
+          Extractor._extract_member_at(
+            filename, fileobj, offset, name, destdir)
+    print('done')
+
+  @staticmethod
+  def _extract_member_at(filename, fileobj, offset, name, destdir):
+    """Extract the named member whose header starts at the given offset."""
+    fileobj.seek(offset)
+    with tarfile.TarFile(fileobj=fileobj, mode='r') as tf:
+      member = tf.firstmember
+      if member is None or member.name != name:
+        raise Exception('index does not match archive [%s]' % filename)
+      Extractor._check_type(member)
+      Extractor._check_name(member.name)
+      tf.extract(member, destdir)
+
+  @staticmethod
+  def iter_members(filename, pattern=None):
+    """
+    Yield a (name, file) pair for each file in the given tar or zip file,
+    where `file` is a binary file-like object reading the member's contents
+    straight from the archive.
+
+    If `pattern` is given, only members whose names match that glob pattern
+    (see fnmatch) are yielded. Every member is checked as in `extract`, and an
+    unsafe member raises an Exception; in a tar file, members preceding it
+    will already have been yielded.
+
+    Tar files are read in a single pass, so each file must be read before
+    advancing to the next member.
+    """
+    def matches(name):
+      return pattern is None or fnmatch.fnmatchcase(name, pattern)
+
+    if tarfile.is_tarfile(filename):
+      with tarfile.open(filename, 'r|*') as tf:
+        for member in tf:
+          Extractor._check_type(member)
+          Extractor._check_name(member.name)
+          if member.isfile() and matches(member.name):
+            yield member.name, tf.extractfile(member)
+    elif zipfile.is_zipfile(filename):
+      with zipfile.ZipFile(filename) as zf:
+        for name in zf.namelist():
+          Extractor._check_name(name)
+        for info in zf.infolist():
+          if not info.is_dir() and matches(info.filename):
+            with zf.open(info) as f:
+              yield info.filename, f
+    else:
+      raise Exception('neither a tar nor zip file [%s]' % str(filename))
+
+  @staticmethod
+  def extract(filename, destdir, stream=False, workers=1, incremental=False):
     """
     Extract the contents of the given file into the given directory.
 
     The destination directory will be created if it doesn't already exist.
     Existing files, if present, will be silently overwritten.
+
+    If `stream` is True, a tar file is read only once, and each member is
+    checked just before it's extracted. An unsafe member is still refused
+    before any of its bytes are written, but members preceding it will already
+    have been extracted. Zip files are extracted as usual.
+
+    If `workers` is greater than 1, the members of a zip file are extracted in
+    that many processes, each given members of similar total compressed size.
+    The result is the same as extracting them in a single process. Tar files
+    are always extracted in a single process.
+
+    If `incremental` is True, members which are unchanged since a previous
+    incremental extraction into the same directory, and whose files haven't
+    been modified since, are skipped (see _Manifest). Tar files are then read
+    in a single pass, as if `stream` were True, and each member's contents are
+    compared with the file on disk, which is only rewritten if they differ.
     """
 
     # determine file type
     if tarfile.is_tarfile(filename):
+      if stream or incremental:
+        print('extracting %s:' % filename)
+        if incremental:
+          Extractor._extract_incremental(filename, destdir, True, workers)
+        else:
+          Extractor._extract_tar_stream(filename, destdir)
+        print('done')
+        return
       open_func = Extractor._open_tar
     elif zipfile.is_zipfile(filename):
+      if incremental:
+        print('extracting %s:' % filename)
+        Extractor._extract_incremental(filename, destdir, False, workers)
+        print('done')
+        return
       open_func = Extractor._open_zip
     else:
       # this file can't be extracted
@@ -78,7 +693,11 @@ class Extractor:
       check(item)
 
     # finally, extract it
-    container.extractall(destdir)
+    if workers > 1 and isinstance(container, zipfile.ZipFile):
+      Extractor._extract_zip_parallel(container, filename, destdir, workers)
+    else:
+      container.extractall(destdir)
+    container.close()
     print('done')
 
 
@@ -97,10 +716,32 @@ def main():
     type=str,
     help='the output directory'
   )
+  parser.add_argument(
+    '--stream',
+    action='store_true',
+    help='extract a tar file in a single pass'
+  )
+  parser.add_argument(
+    '--workers',
+    type=int,
+    default=1,
+    help='number of processes for extracting a zip file'
+  )
+  parser.add_argument(
+    '--incremental',
+    action='store_true',
+    help='skip members which are unchanged since the last extraction'
+  )
   args = parser.parse_args()
 
   # extract the file
-  Extractor.extract(args.filename, args.destdir)
+  Extractor.extract(
+    args.filename,
+    args.destdir,
+    stream=args.stream,
+    workers=args.workers,
+    incremental=args.incremental,
+  )
 
 
 if __name__ == '__main__':
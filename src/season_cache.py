@@ -0,0 +1,290 @@
+"""
+===============
+=== Purpose ===
+===============
+
+A persistent cache for pure functions of (location, epiweek).
+
+Values for epiweeks in a flu season which has ended never change, so they are
+kept on disk and reused across runs. Each closed season is stored in its own
+compact binary file, which is read only when a value from that season is first
+needed. A bounded number of closed seasons are kept in memory, and the least
+recently used season is dropped (after writing any new values to disk) to make
+room for another. Values for the current (or a future) season may still
+change, so they are only kept in a bounded, in-memory LRU cache.
+
+Several caches may share a directory. When a season's file is written, values
+which another cache has written to it in the meantime are kept. If two caches
+write different values for the same key, the last writer wins.
+
+Seasons are as defined by epiweek.get_season. The off-season weeks (21 through
+39) of each year are treated as a season of their own.
+
+Locations must be strings, and cached values must be numbers; values are
+stored as 64-bit floats.
+
+Typical usage:
+````
+cache = SeasonCache('cache/baselines')
+
+@cache.memoize
+def get_baseline(location, epiweek):
+  ...
+
+get_baseline('pa', 201744)
+cache.flush()
+print(cache.num_hits, cache.num_misses)
+````
+
+
+=================
+=== Changelog ===
+=================
+
+2026-10-17
+  + initial version
+"""
+
+# standard library
+import collections
+import numbers
+import os
+import struct
+import tempfile
+
+# first party
+from delphi.utils.epidate import EpiDate
+from delphi.utils.epiweek import add_epiweeks, delta_epiweeks, get_season
+from delphi.utils.epiweek import join_epiweek, split_epiweek
+
+
+# returned by `get` when there's no cached value
+_MISSING = object()
+
+
+def _get_partition(epiweek):
+  """Return the (first, last) epiweeks of the season containing the epiweek."""
+  def offseason(ew):
+    year = split_epiweek(ew)[0]
+    return (join_epiweek(year, 21), join_epiweek(year, 39))
+  return get_season(epiweek, offseason=offseason)
+
+
+class SeasonCache:
+  """Caches values by (location, epiweek), persisting closed seasons."""
+
+  # file format: magic, first epiweek, number of locations, number of values
+  MAGIC = b'EPISEA01'
+  HEADER = struct.Struct('<8s3i')
+  # a location, as the length of its UTF-8 encoding followed by the encoding
+  LOCATION = struct.Struct('<H')
+  # a value, as the index of its location, its week in the season, and itself
+  RECORD = struct.Struct('<HBd')
+
+  def __init__(self, directory, epiweek=None, max_size=4096, max_seasons=16):
+    """
+    `directory` holds one file per closed season. Seasons which end before
+    `epiweek` (by default, the current epiweek) are closed. At most
+    `max_seasons` closed seasons, and `max_size` values from other seasons,
+    are kept in memory.
+    """
+    if max_size < 1:
+      raise Exception('max_size must be positive')
+    if max_seasons < 1:
+      raise Exception('max_seasons must be positive')
+    if epiweek is None:
+      epiweek = EpiDate.today().get_ew()
+    self.directory = directory
+    self.epiweek = epiweek
+    self.max_size = max_size
+    self.max_seasons = max_seasons
+    self.num_hits = 0
+    self.num_misses = 0
+    self.num_evictions = 0
+    self.num_season_evictions = 0
+    self.num_loads = 0
+    # (location, epiweek) -> value, for open seasons, least recent first
+    self._recent = collections.OrderedDict()
+    # first epiweek -> {(location, epiweek): value}, for closed seasons, least
+    # recent first
+    self._closed = collections.OrderedDict()
+    # first epiweeks of closed seasons with values not yet written to disk
+    self._dirty = set()
+    os.makedirs(directory, exist_ok=True)
+
+  def _get_filename(self, first):
+    return os.path.join(self.directory, '%d.bin' % first)
+
+  def _get_closed(self, epiweek):
+    """
+    Return the values of the closed season containing the epiweek, loading
+    them from disk if needed, or None if the season isn't closed.
+    """
+    first, last = _get_partition(epiweek)
+    if last >= self.epiweek:
+      return None
+    values = self._closed.get(first)
+    if values is not None:
+      self._closed.move_to_end(first)
+      return values
+    values = self._closed[first] = self._load(first)
+    while len(self._closed) > self.max_seasons:
+      self._evict_season()
+    return values
+
+  def _evict_season(self):
+    """Drop the least recently used closed season, saving it if needed."""
+    first = next(iter(self._closed))
+    if first in self._dirty:
+      self._save(first)
+      self._dirty.discard(first)
+    del self._closed[first]
+    self.num_season_evictions += 1
+
+  def _load(self, first):
+    """Read a season's values from disk, or return {} if there's no file."""
+    values = self._read(first)
+    if values is None:
+      return {}
+    self.num_loads += 1
+    return values
+
+  def _read(self, first):
+    """Return a season's values from its file, or None if there's no file."""
+    filename = self._get_filename(first)
+    if not os.path.exists(filename):
+      return None
+    with open(filename, 'rb') as f:
+      data = f.read()
+    magic, file_first, num_locations, num_values = \
+      SeasonCache.HEADER.unpack_from(data)
+    if magic != SeasonCache.MAGIC or file_first != first:
+      raise Exception('not a season cache file [%s]' % filename)
+    offset = SeasonCache.HEADER.size
+    locations = []
+    for _ in range(num_locations):
+      (size,) = SeasonCache.LOCATION.unpack_from(data, offset)
+      offset += SeasonCache.LOCATION.size
+      locations.append(data[offset:offset + size].decode('utf-8'))
+      offset += size
+    if len(data) - offset != num_values * SeasonCache.RECORD.size:
+      raise Exception('season cache file is truncated [%s]' % filename)
+    values = {}
+    records = SeasonCache.RECORD.iter_unpack(data[offset:])
+    for location, week, value in records:
+      values[(locations[location], add_epiweeks(first, week))] = value
+    return values
+
+  def _save(self, first):
+    """
+    Write a season's values to disk, replacing any previous file but keeping
+    the values in it which this cache doesn't have.
+    """
+    # another cache may have written the file since this one loaded it
+    values = self._read(first) or {}
+    values.update(self._closed[first])
+    self._closed[first] = values
+    locations = sorted(set(location for location, _ in values))
+    if len(locations) > 0xffff:
+      raise Exception('too many locations in season [%d]' % first)
+    indices = {location: i for i, location in enumerate(locations)}
+    chunks = [
+      SeasonCache.HEADER.pack(
+        SeasonCache.MAGIC, first, len(locations), len(values))
+    ]
+    for location in locations:
+      encoded = location.encode('utf-8')
+      chunks.append(SeasonCache.LOCATION.pack(len(encoded)) + encoded)
+    for (location, epiweek), value in sorted(values.items()):
+      week = delta_epiweeks(first, epiweek)
+      chunks.append(SeasonCache.RECORD.pack(indices[location], week, value))
+    # write to a temporary file first so that readers never see a partial file,
+    # using a unique name so that concurrent writers don't write to the same
+    # temporary file; a value written by another cache between the read above
+    # and the replacement below is still lost
+    with tempfile.NamedTemporaryFile(
+        dir=self.directory, suffix='.tmp', delete=False) as f:
+      f.write(b''.join(chunks))
+    os.replace(f.name, self._get_filename(first))
+
+  def get(self, location, epiweek, default=None):
+    """Return the cached value, or `default` if there is none."""
+    key = (location, epiweek)
+    closed = self._get_closed(epiweek)
+    if closed is not None:
+      value = closed.get(key, default)
+    elif key in self._recent:
+      self._recent.move_to_end(key)
+      value = self._recent[key]
+    else:
+      value = default
+    return value
+
+  def put(self, location, epiweek, value):
+    """Cache a value, which must be a number."""
+    if not isinstance(value, numbers.Real):
+      args = (location, epiweek, value)
+      raise Exception('value is not a number: (%r, %r) -> %r' % args)
+    key = (location, epiweek)
+    value = float(value)
+    closed = self._get_closed(epiweek)
+    if closed is not None:
+      closed[key] = value
+      self._dirty.add(_get_partition(epiweek)[0])
+    else:
+      self._recent[key] = value
+      self._recent.move_to_end(key)
+      if len(self._recent) > self.max_size:
+        self._recent.popitem(last=False)
+        self.num_evictions += 1
+
+  def get_or_compute(self, func, location, epiweek):
+    """Return the cached value, calling `func(location, epiweek)` if needed."""
+    value = self.get(location, epiweek, _MISSING)
+    if value is not _MISSING:
+      self.num_hits += 1
+      return value
+    self.num_misses += 1
+    value = func(location, epiweek)
+    self.put(location, epiweek, value)
+    return float(value)
+
+  def memoize(self, func):
+    """Return a wrapper of `func(location, epiweek)` which uses this cache."""
+    def wrapper(location, epiweek):
+      return self.get_or_compute(func, location, epiweek)
+    wrapper.__name__ = func.__name__
+    wrapper.__doc__ = func.__doc__
+    return wrapper
+
+  def invalidate(self, epiweek):
+    """Drop all values for the season containing the epiweek."""
+    first, _ = _get_partition(epiweek)
+    self._closed.pop(first, None)
+    self._dirty.discard(first)
+    keys = [k for k in self._recent if _get_partition(k[1])[0] == first]
+    for key in keys:
+      del self._recent[key]
+    filename = self._get_filename(first)
+    if os.path.exists(filename):
+      os.remove(filename)
+
+  def flush(self):
+    """Write new values for closed seasons to disk."""
+    for first in sorted(self._dirty):
+      self._save(first)
+    self._dirty.clear()
+
+  def get_stats(self):
+    """Return a dict of cache statistics."""
+    lookups = self.num_hits + self.num_misses
+    return {
+      'hits': self.num_hits,
+      'misses': self.num_misses,
+      'hit_rate': self.num_hits / lookups if lookups else 0.0,
+      'evictions': self.num_evictions,
+      'season_evictions': self.num_season_evictions,
+      'loads': self.num_loads,
+      'recent_size': len(self._recent),
+      'closed_size': len(self._closed),
+    }
@@ -0,0 +1,216 @@
+"""
+===============
+=== Purpose ===
+===============
+
+A week-numbering engine for calendars with different week rules.
+
+A week calendar is defined by the day on which weeks start and by which week
+of the year is numbered week 1. Weeks are represented as ints like epiweeks,
+i.e. `year * 100 + week`. Days are represented by their index, as in
+EpiDate.get_index (day 0 is 0001-01-01).
+
+Some common calendars are predefined:
+  MMWR: weeks start on Sunday; week 1 contains January 4 (i.e. epiweeks, as
+    used throughout epiweek.py)
+  ISO: ISO-8601 weeks, which start on Monday; week 1 contains January 4
+
+Other calendars can be defined as needed. For example, fiscal weeks starting
+on Monday where week 1 is the week containing January 1:
+````
+FISCAL = WeekCalendar(week_start=1, first_week_day=1)
+FISCAL.convert(201801, ISO)
+````
+
+Each calendar precomputes the number of weeks in, and the ordinal of week 1
+of, every year in [first_year, last_year). Within that range, conversions are
+table lookups; outside of it, or for weeks which aren't ints (e.g. floats read
+from a pandas column), they are computed directly.
+
+
+=================
+=== Changelog ===
+=================
+
+2026-10-17
+  + initial version
+"""
+
+# standard library
+import numbers
+
+# number of weeks in a 400-year Gregorian cycle, under any week rule
+_WEEKS_PER_400_YEARS = 20871
+
+
+class WeekCalendar:
+  """ a calendar of weeks that start on a fixed day of the week """
+
+  def __init__(self, week_start, first_week_day, first_year=1900, last_year=2100):
+    """
+    week_start: day of the week on which weeks start, 0 (Sunday) through 6
+      (Saturday), as in EpiDate.get_day_of_week
+    first_week_day: week 1 of a year is the week containing this day of
+      January, 1 through 7
+    first_year, last_year: years in [first_year, last_year) are served from
+      precomputed tables
+    """
+    if not 0 <= week_start <= 6 or not 1 <= first_week_day <= 7:
+      raise Exception('invalid week rule')
+    self.week_start = week_start
+    self.first_week_day = first_week_day
+    self.first_year = first_year
+    self.last_year = last_year
+    # first day of week 1 of `first_year`, which has ordinal 0
+    self._first_day = self.get_first_day(first_year)
+    # number of weeks in, and ordinal of week 1 of, year `first_year + i`
+    self._num_weeks = []
+    self._year_offsets = [0]
+    for year in range(first_year, last_year):
+      self._num_weeks.append(self._compute_num_weeks(year))
+      self._year_offsets.append(self._year_offsets[-1] + self._num_weeks[-1])
+
+  def __repr__(self):
+    args = (self.week_start, self.first_week_day)
+    return 'WeekCalendar(week_start=%d, first_week_day=%d)' % args
+
+  def get_first_day(self, year):
+    """ return the day index of the first day of week 1 of the year """
+    y = year - 1
+    day = y * 365 + y // 4 - y // 100 + y // 400 + self.first_week_day - 1
+    # day 0 is a Monday
+    return day - (day + 1 - self.week_start) % 7
+
+  def _compute_num_weeks(self, year):
+    """ return the number of weeks in the year, without using the table """
+    return (self.get_first_day(year + 1) - self.get_first_day(year)) // 7
+
+  def _in_table(self, year):
+    """ return True if the year can be looked up in the tables """
+    return isinstance(year, numbers.Integral) and \
+      self.first_year <= year < self.last_year
+
+  def get_num_weeks(self, year):
+    """ return the number of weeks in the year """
+    if self._in_table(year):
+      return self._num_weeks[year - self.first_year]
+    elif year < 1:
+      raise Exception('not sure how many weeks: year=%d' % year)
+    else:
+      return self._compute_num_weeks(year)
+
+  def check_week(self, *weeks, fatal=True):
+    """ return True if the week is valid, otherwise raise Exception """
+    for week in weeks:
+      year, w = divmod(week, 100)
+      if not 1 <= w <= self.get_num_weeks(year):
+        if fatal:
+          raise Exception('invalid week: week=%d' % week)
+        else:
+          return False
+    return True
+
+  def validate(self, weeks, failures=False, count=False):
+    """
+    check any number of weeks in a single pass, without raising exceptions
+    by default, return a list of booleans which are True for valid weeks
+    if "failures" is True, instead return a list of (index, reason) pairs for
+      the invalid weeks
+    if "count" is True, return the above paired with the number of valid
+      weeks
+    """
+    results = []
+    num_valid = 0
+    first_year, last_year = self.first_year, self.last_year
+    for i, week in enumerate(weeks):
+      if not isinstance(week, numbers.Integral):
+        reason = 'not an integer'
+      else:
+        year, w = divmod(week, 100)
+        if first_year <= year < last_year:
+          num_weeks = self._num_weeks[year - first_year]
+        elif year >= 1:
+          num_weeks = self._compute_num_weeks(year)
+        else:
+          num_weeks = None
+        if num_weeks is None:
+          reason = 'year out of range'
+        elif not 1 <= w <= num_weeks:
+          reason = 'week out of range'
+        else:
+          reason = None
+      if reason is None:
+        num_valid += 1
+      if not failures:
+        results.append(reason is None)
+      elif reason is not None:
+        results.append((i, reason))
+    if count:
+      return results, num_valid
+    return results
+
+  def week_to_ordinal(self, week):
+    """
+    return the number of weeks between the first week of `first_year` and the
+    given week
+    """
+    self.check_week(week)
+    year, w = divmod(week, 100)
+    if self._in_table(year):
+      return self._year_offsets[year - self.first_year] + w - 1
+    return (self.get_first_day(year) - self._first_day) // 7 + w - 1
+
+  def ordinal_to_week(self, ordinal):
+    """ return the week having the given ordinal """
+    # estimate the year from the average year length, then correct it
+    i = (ordinal * 400) // _WEEKS_PER_400_YEARS
+    offsets = self._year_offsets
+    if isinstance(ordinal, numbers.Integral) and 0 <= ordinal < offsets[-1]:
+      # the estimate is off by at most one
+      if offsets[i] > ordinal:
+        i -= 1
+      elif offsets[i + 1] <= ordinal:
+        i += 1
+      return (self.first_year + i) * 100 + ordinal - offsets[i] + 1
+    # outside of the table, compare against the first day of each year instead
+    day = self._first_day + ordinal * 7
+    year = self.first_year + i
+    while self.get_first_day(year) > day:
+      year -= 1
+    while self.get_first_day(year + 1) <= day:
+      year += 1
+    if year < 1:
+      raise Exception('ordinal out of range: ordinal=%d' % ordinal)
+    return year * 100 + (day - self.get_first_day(year)) // 7 + 1
+
+  def add_weeks(self, week, i):
+    """ return the week plus (or minus) the number of weeks """
+    return self.ordinal_to_week(self.week_to_ordinal(week) + i)
+
+  def delta_weeks(self, week1, week2):
+    """ return the number of weeks between the two weeks """
+    return self.week_to_ordinal(week2) - self.week_to_ordinal(week1)
+
+  def day_to_week(self, index):
+    """ return the week containing the day index """
+    return self.ordinal_to_week((index - self._first_day) // 7)
+
+  def week_to_day(self, week):
+    """ return the day index of the first day of the week """
+    return self._first_day + self.week_to_ordinal(week) * 7
+
+  def convert(self, week, calendar, offset=3):
+    """
+    return the week of the other calendar which contains the given day of
+    this calendar's week
+    "offset" is the day within the week, where 0 is the first day; it has no
+      effect when both calendars' weeks start on the same day
+    """
+    return calendar.day_to_week(self.week_to_day(week) + offset)
+
+
+# epiweeks, as defined by the CDC's Morbidity and Mortality Weekly Report
+MMWR = WeekCalendar(week_start=0, first_week_day=4)
+
+# ISO-8601 weeks
+ISO = WeekCalendar(week_start=1, first_week_day=4)
@@ -0,0 +1,87 @@
+"""Unit tests for aggregator.py."""
+
+# standard library
+import unittest
+
+# first party
+from delphi.utils.epidate import EpiDate
+
+# py3tester coverage target
+__test_target__ = 'delphi.utils.aggregator'
+
+
+class UnitTests(unittest.TestCase):
+  """Basic unit tests."""
+
+  # 2017-11-12 is the first day (Sunday) of epiweek 201746
+  start = EpiDate(2017, 11, 12)
+
+  def rows(self):
+    """Return three weeks of daily rows for two keys."""
+    rows = []
+    for i in range(21):
+      date = UnitTests.start.add_days(i)
+      rows.append((date, 'a', i))
+      rows.append((date, 'b', 100 - i))
+    return rows
+
+  def test_aggregate(self):
+    results = list(aggregate(self.rows(), how='sum'))
+    self.assertEqual(results, [
+      (201746, 'a', sum(range(0, 7))),
+      (201746, 'b', sum(100 - i for i in range(0, 7))),
+      (201747, 'a', sum(range(7, 14))),
+      (201747, 'b', sum(100 - i for i in range(7, 14))),
+      (201748, 'a', sum(range(14, 21))),
+      (201748, 'b', sum(100 - i for i in range(14, 21))),
+    ])
+
+  def test_functions(self):
+    how = EpiweekAggregator.FUNCTIONS
+    results = list(aggregate(self.rows(), how=how))
+    self.assertEqual(results[0], (201746, 'a', (21, 3, 7, 0, 6, 6)))
+    self.assertEqual(results[1], (201746, 'b', (679, 97, 7, 94, 100, 94)))
+    with self.assertRaises(Exception):
+      EpiweekAggregator(how='median')
+    with self.assertRaises(Exception):
+      EpiweekAggregator(lateness=-1)
+
+  def test_streaming(self):
+    aggregator = EpiweekAggregator(how='count')
+    day = UnitTests.start.get_index()
+
+    # nothing is emitted until the week closes
+    for i in range(7):
+      self.assertEqual(aggregator.push(day + i, 'a', 1), [])
+    self.assertEqual(aggregator.push(day + 7, 'a', 1), [(201746, 'a', 7)])
+
+    # rows for closed weeks are counted and dropped
+    self.assertEqual(aggregator.push(day + 6, 'a', 1), [])
+    self.assertEqual(aggregator.num_late, 1)
+
+    # skipping ahead closes everything before
+    self.assertEqual(aggregator.push(day + 30, 'a', 1), [(201747, 'a', 1)])
+    self.assertEqual(aggregator.flush(), [(201750, 'a', 1)])
+    self.assertEqual(aggregator.flush(), [])
+
+  def test_lateness(self):
+    aggregator = EpiweekAggregator(how=('count', 'last'), lateness=3)
+    day = UnitTests.start.get_index()
+    rows = [(day + 8, 'a', 8), (day + 1, 'a', 1), (day + 9, 'a', 9), (day + 2, 'a', 2)]
+    self.assertEqual(aggregator.push_many(rows), [])
+    self.assertEqual(aggregator.push(day + 10, 'a', 10), [(201746, 'a', (2, 2))])
+    self.assertEqual(aggregator.push(day + 3, 'a', 3), [])
+    self.assertEqual(aggregator.num_late, 1)
+    self.assertEqual(aggregator.flush(), [(201747, 'a', (3, 10))])
+
+  def test_push_arrays(self):
+    aggregator = EpiweekAggregator(how='max')
+    day = UnitTests.start.get_index()
+    days = [day, day + 1, day + 7]
+    results = aggregator.push_arrays(days, ['a', 'a', 'a'], [5, 2, 0])
+    self.assertEqual(results, [(201746, 'a', 5)])
+
+  def test_outside_calendar(self):
+    rows = [(EpiDate(1899, 12, 30), 'a', 1), (EpiDate(1899, 12, 31), 'a', 1)]
+    results = list(aggregate(rows, how='count'))
+    self.assertEqual(results, [(189952, 'a', 1), (190001, 'a', 1)])
@@ -0,0 +1,91 @@
+"""Unit tests for epicalendar.py."""
+
+# standard library
+import datetime
+import os
+import tempfile
+import unittest
+
+# first party
+import delphi.utils.epiweek as utils_epiweek
+
+# py3tester coverage target
+__test_target__ = 'delphi.utils.epicalendar'
+
+
+class UnitTests(unittest.TestCase):
+  """Basic unit tests."""
+
+  def day_index(self, year, month, day):
+    """Return the day index (0 is 0001-01-01) of the date."""
+    return datetime.date(year, month, day).toordinal() - 1
+
+  def test_build(self):
+    calendar = Calendar.build(2014, 2018)
+
+    # the first epiweek of 2014 started on 2013-12-29
+    self.assertEqual(calendar.first_day, self.day_index(2013, 12, 29))
+    self.assertEqual(len(calendar.epiweeks), (53 + 52 * 3) * 7)
+
+    # every week starts on a Sunday and has 7 days
+    for ew in utils_epiweek.range_epiweeks(201401, 201801):
+      with self.subTest(ew=ew):
+        day = calendar.get_first_day(ew)
+        self.assertEqual(datetime.date.fromordinal(day + 1).isoweekday(), 7)
+        for i in range(7):
+          self.assertEqual(calendar.get_epiweek(day + i), ew)
+
+  def test_get_epiweek(self):
+    calendar = get_calendar()
+    for y, m, d, ew in (
+      (2006, 12, 30, 200652),
+      (2006, 12, 31, 200701),
+      (2009, 1, 3, 200853),
+      (2015, 1, 4, 201501),
+      (2017, 11, 14, 201746),
+    ):
+      with self.subTest(y=y, m=m, d=d):
+        self.assertEqual(calendar.get_epiweek(self.day_index(y, m, d)), ew)
+
+    # out of range
+    self.assertIsNone(calendar.get_epiweek(0))
+    self.assertEqual(calendar.get_epiweek(-1, default=-1), -1)
+
+  def test_get_first_day(self):
+    calendar = get_calendar()
+    self.assertEqual(calendar.get_first_day(201501), self.day_index(2015, 1, 4))
+    self.assertEqual(calendar.get_first_day(201453), self.day_index(2014, 12, 28))
+
+    # invalid epiweeks
+    for ew in (201553, 201500, 201554, 189952, 210001):
+      with self.subTest(ew=ew):
+        self.assertIsNone(calendar.get_first_day(ew))
+    self.assertEqual(calendar.get_first_day(201553, default=-1), -1)
+
+  def test_save_and_load(self):
+    calendar = Calendar.build(1990, 2030)
+    with tempfile.TemporaryDirectory() as tmp:
+      filename = os.path.join(tmp, 'epiweeks.cal')
+      calendar.save(filename)
+      loaded = Calendar.load(filename)
+      self.assertEqual(loaded.first_year, 1990)
+      self.assertEqual(loaded.last_year, 2030)
+      self.assertEqual(loaded.first_day, calendar.first_day)
+      self.assertEqual(list(loaded.epiweeks), list(calendar.epiweeks))
+      self.assertEqual(list(loaded.first_days), list(calendar.first_days))
+      self.assertEqual(loaded.get_first_day(201453), calendar.get_first_day(201453))
+
+      # not a calendar
+      with open(filename, 'wb') as f:
+        f.write(b'\x00' * 64)
+      with self.assertRaises(Exception):
+        Calendar.load(filename)
+
+  def test_set_calendar(self):
+    original = get_calendar()
+    try:
+      calendar = Calendar.build(2010, 2011)
+      set_calendar(calendar)
+      self.assertIs(get_calendar(), calendar)
+    finally:
+      set_calendar(original)
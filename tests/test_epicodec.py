@@ -0,0 +1,89 @@
+"""Unit tests for epicodec.py."""
+
+# standard library
+import mmap
+import tempfile
+import unittest
+
+# first party
+from delphi.utils.epidate import EpiDate
+
+# py3tester coverage target
+__test_target__ = 'delphi.utils.epicodec'
+
+
+class UnitTests(unittest.TestCase):
+  """Basic unit tests."""
+
+  def test_parse_dates(self):
+    values = ['2017-11-14', '20171115', '2016-02-29', '2017-11-14', '00010101']
+    expected = [
+      EpiDate(2017, 11, 14).get_index(),
+      EpiDate(2017, 11, 15).get_index(),
+      EpiDate(2016, 2, 29).get_index(),
+      EpiDate(2017, 11, 14).get_index(),
+      0,
+    ]
+    self.assertEqual(parse_dates(values), (expected, []))
+
+    # bytes values and buffers
+    self.assertEqual(parse_dates([v.encode() for v in values]), (expected, []))
+    buffer = ('\n'.join(values) + '\n').encode()
+    self.assertEqual(parse_dates(buffer), (expected, []))
+    self.assertEqual(parse_dates(memoryview(buffer)), (expected, []))
+    self.assertEqual(parse_dates(buffer.replace(b'\n', b'\r\n')), (expected, []))
+
+  def test_buffer_lines(self):
+    # no trailing newline, mixed line breaks, and a blank line
+    buffer = b'201744\r\n201745\n\n201746'
+    actual = list(parse_epiweeks(buffer)[0])
+    self.assertEqual(actual, [201744, 201745, None, 201746])
+    with tempfile.TemporaryFile() as f:
+      f.write(buffer)
+      f.flush()
+      with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+        self.assertEqual(parse_epiweeks(m)[0], actual)
+    # lines are produced lazily
+    lines = _get_lines(memoryview(b'a\nb\n'))
+    self.assertEqual(next(lines), 'a')
+
+  def test_parse_bad_dates(self):
+    bad = [
+      '2017/11/14', '2017-1-14', '2017-02-29', '20171301', '00000101',
+      '2017111', '２０１７１１１４', 'x', '', '2017-11-1x',
+    ]
+    values = ['20171114'] + bad + ['20171114']
+    indices, errors = parse_dates(values)
+    self.assertEqual(indices[0], EpiDate(2017, 11, 14).get_index())
+    self.assertEqual(indices[-1], indices[0])
+    self.assertEqual(indices[1:-1], [None] * len(bad))
+    self.assertEqual(errors, list(enumerate(bad, 1)))
+
+  def test_parse_epiweeks(self):
+    values = ['201744', '2017w44', '2014W53', '201744']
+    self.assertEqual(parse_epiweeks(values), ([201744, 201744, 201453, 201744], []))
+    self.assertEqual(parse_epiweeks(b'201744\n201453\n'), ([201744, 201453], []))
+
+    bad = ['201753', '201700', '2017-44', '20174', '000052', 'w20174', '']
+    epiweeks, errors = parse_epiweeks(bad)
+    self.assertEqual(epiweeks, [None] * len(bad))
+    self.assertEqual(errors, list(enumerate(bad)))
+
+  def test_format_dates(self):
+    dates = [EpiDate(2017, 11, 14), EpiDate(1, 1, 1), EpiDate(2017, 11, 14)]
+    indices = [d.get_index() for d in dates]
+    expected = [str(d) for d in dates]
+    self.assertEqual(format_dates(indices), expected)
+    self.assertEqual(format_dates(indices, sep=''), [s.replace('-', '') for s in expected])
+    self.assertEqual(format_dates(indices, as_bytes=True), ('\n'.join(expected) + '\n').encode())
+    self.assertEqual(format_dates([]), [])
+
+    # round trip
+    self.assertEqual(parse_dates(format_dates(indices, as_bytes=True)), (indices, []))
+
+  def test_format_epiweeks(self):
+    epiweeks = [201744, 201501, 201744]
+    self.assertEqual(format_epiweeks(epiweeks), ['201744', '201501', '201744'])
+    self.assertEqual(format_epiweeks(epiweeks, sep='w'), ['2017w44', '2015w01', '2017w44'])
+    self.assertEqual(format_epiweeks(epiweeks, as_bytes=True), b'201744\n201501\n201744\n')
+    self.assertEqual(parse_epiweeks(format_epiweeks(epiweeks, sep='w')), (epiweeks, []))
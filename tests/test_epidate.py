@@ -1,9 +1,13 @@
 """Unit tests for epidate.py."""
 
 # standard library
+import copy
+import datetime
+import pickle
 import unittest
 
 # first party
+import delphi.utils.epicalendar as utils_epicalendar
 import delphi.utils.epiweek as utils_epiweek
 
 # py3tester coverage target
@@ -128,6 +132,24 @@ class FunctionTests(unittest.TestCase):
       with self.subTest(y=y, m=m, d=d, epwk=epwk):
         self.assertEqual(EpiDate(y, m, d).get_ew(), epwk)
 
+    # dates outside of the precomputed calendar
+    self.assertEqual(EpiDate(1899, 12, 30).get_ew(), 189952)
+    self.assertEqual(EpiDate(1899, 12, 31).get_ew(), 190001)
+    self.assertEqual(EpiDate(1899, 12, 30).get_ew_week(), 52)
+    self.assertEqual(EpiDate(2200, 1, 1).get_ew_year(), 2200)
+
+    # same results when computed without the precomputed calendar
+    calendar = utils_epicalendar.get_calendar()
+    first = EpiDate(2000, 1, 1).get_index()
+    last = EpiDate(2020, 12, 31).get_index()
+    expected = [calendar.get_epiweek(i) for i in range(first, last + 1)]
+    try:
+      utils_epicalendar.set_calendar(utils_epicalendar.Calendar.build(2010, 2011))
+      actual = [EpiDate.from_index(i).get_ew() for i in range(first, last + 1)]
+    finally:
+      utils_epicalendar.set_calendar(calendar)
+    self.assertEqual(actual, expected)
+
   def test_add_days(self):
     date = EpiDate(2017, 11, 14)
 
@@ -200,6 +222,46 @@ class FunctionTests(unittest.TestCase):
     self.assertIn('04', s)
     self.assertEqual(len(s), 10)
 
+  def test_immutable(self):
+    date = EpiDate(2017, 11, 14)
+    with self.assertRaises(AttributeError):
+      date.year = 2018
+    with self.assertRaises(AttributeError):
+      date.other = 0
+    with self.assertRaises(AttributeError):
+      del date.day
+    self.assert_date(date, 2017, 11, 14)
+
+    # copies and pickles are equal to the original
+    self.assertEqual(copy.copy(date), date)
+    self.assertEqual(pickle.loads(pickle.dumps(date)), date)
+
+  def test_comparison(self):
+    a, b, c = EpiDate(2016, 12, 31), EpiDate(2017, 1, 1), EpiDate(2017, 1, 1)
+    self.assertTrue(a < b <= c)
+    self.assertTrue(c >= b > a)
+    self.assertTrue(b == c)
+    self.assertTrue(a != b)
+    self.assertFalse(a == 736328)
+    self.assertEqual(sorted([c, a]), [a, c])
+    with self.assertRaises(TypeError):
+      a < 0
+
+  def test_hash(self):
+    a, b = EpiDate(2017, 11, 14), EpiDate(2017, 11, 14)
+    self.assertEqual(hash(a), hash(b))
+    self.assertEqual(len(set([a, b, a.add_days(1)])), 2)
+    self.assertEqual({a: 1}[b], 1)
+
+  def test_subtract(self):
+    date = EpiDate(2017, 11, 14)
+    self.assertEqual(date - date, 0)
+    self.assertEqual(date.add_days(10) - date, 10)
+    self.assertEqual(EpiDate(2005, 1, 1) - EpiDate(2004, 1, 1), 366)
+    self.assertEqual(EpiDate(2004, 1, 1) - EpiDate(2005, 1, 1), -366)
+    with self.assertRaises(TypeError):
+      date - 1
+
   def test_get_day_name(self):
     self.assertEqual(EpiDate.get_day_name(0).lower(), 'sunday')
     self.assertEqual(EpiDate.get_day_name(0, short=True).lower(), 'sun')
@@ -239,6 +301,15 @@ class FunctionTests(unittest.TestCase):
     for idx in range(first_index, last_index + 1):
       self.assertEqual(EpiDate.from_index(idx).get_index(), idx)
 
+    # agrees with the standard library over the whole supported range,
+    # including the last day of every leap year
+    last_index = datetime.date(9999, 12, 31).toordinal() - 1
+    leap_ends = [EpiDate(y, 12, 31).get_index() for y in range(4, 10000, 4)]
+    for idx in list(range(0, last_index + 1, 997)) + leap_ends + [last_index]:
+      with self.subTest(idx=idx):
+        date = datetime.date.fromordinal(idx + 1)
+        self.assert_date(EpiDate.from_index(idx), date.year, date.month, date.day)
+
     with self.assertRaises(Exception):
       EpiDate.from_index(-1)
 
@@ -265,3 +336,39 @@ class FunctionTests(unittest.TestCase):
       EpiDate.from_epiweek(2017, 53)
     with self.assertRaises(Exception):
       EpiDate.from_epiweek(0, 30)
+
+    # years outside of the epiweek tables
+    for year, week in ((1, 1), (1896, 53), (2200, 53), (9998, 52)):
+      with self.subTest(year=year, week=week):
+        date = EpiDate.from_epiweek(year, week)
+        self.assertEqual(date.get_ew(), utils_epiweek.join_epiweek(year, week))
+        self.assertEqual(date.get_day_of_week(), 3)
+    with self.assertRaises(Exception):
+      EpiDate.from_epiweek(1899, 53)
+
+    # same results when computed without the precomputed calendar
+    calendar = utils_epicalendar.get_calendar()
+    try:
+      utils_epicalendar.set_calendar(utils_epicalendar.Calendar.build(2010, 2011))
+      for year in range(2000, 2020):
+        for week in range(1, utils_epiweek.get_num_weeks(year) + 1):
+          with self.subTest(year=year, week=week):
+            date = EpiDate.from_epiweek(year, week)
+            self.assertEqual(date.get_index(), calendar.get_first_day(year * 100 + week) + 3)
+      with self.assertRaises(Exception):
+        EpiDate.from_epiweek(2017, 53)
+    finally:
+      utils_epicalendar.set_calendar(calendar)
+
+  def test_from_epiweeks(self):
+    epiweeks = [201453, 201501, 201744, 200853]
+    dates = EpiDate.from_epiweeks(epiweeks)
+    indices = EpiDate.from_epiweeks(epiweeks, index=True)
+    for ew, date, idx in zip(epiweeks, dates, indices):
+      with self.subTest(ew=ew):
+        expected = EpiDate.from_epiweek(*utils_epiweek.split_epiweek(ew))
+        self.assertEqual(date.get_index(), expected.get_index())
+        self.assertEqual(idx, expected.get_index())
+    self.assertEqual(EpiDate.from_epiweeks([]), [])
+    with self.assertRaises(Exception):
+      EpiDate.from_epiweeks([201744, 201753])
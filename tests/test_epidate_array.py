@@ -0,0 +1,105 @@
+"""Unit tests for epidate_array.py."""
+
+# standard library
+import unittest
+
+# third party
+import numpy as np
+
+# first party
+from delphi.utils.epidate import EpiDate
+
+# py3tester coverage target
+__test_target__ = 'delphi.utils.epidate_array'
+
+
+class UnitTests(unittest.TestCase):
+  """Basic unit tests."""
+
+  dates = [
+    EpiDate(2006, 12, 30),
+    EpiDate(2006, 12, 31),
+    EpiDate(2009, 1, 3),
+    EpiDate(2016, 2, 29),
+    EpiDate(2017, 1, 31),
+    EpiDate(2017, 11, 14),
+  ]
+
+  def setUp(self):
+    self.array = EpiDateArray.from_dates(UnitTests.dates)
+
+  def test_dates(self):
+    self.assertEqual(len(self.array), len(UnitTests.dates))
+    self.assertEqual(self.array.indices.dtype, np.int32)
+    self.assertEqual(self.array.to_dates(), UnitTests.dates)
+    self.assertEqual(list(self.array), UnitTests.dates)
+    self.assertEqual(self.array[1], UnitTests.dates[1])
+    self.assertEqual(self.array[2:4].to_dates(), UnitTests.dates[2:4])
+    self.assertEqual(EpiDateArray.from_dates([]).to_dates(), [])
+    with self.assertRaises(Exception):
+      EpiDateArray([-1])
+
+  def test_components(self):
+    for name in ('get_index', 'get_year', 'get_month', 'get_day',
+                 'get_day_of_week', 'get_ew', 'get_ew_year', 'get_ew_week'):
+      with self.subTest(name=name):
+        expected = [getattr(d, name)() for d in UnitTests.dates]
+        self.assertEqual(list(getattr(self.array, name)()), expected)
+
+  def test_add(self):
+    for name, num in (
+      ('add_days', 1),
+      ('add_days', -400),
+      ('add_weeks', 3),
+      ('add_months', 1),
+      ('add_months', -11),
+      ('add_months', 48),
+      ('add_years', 1),
+      ('add_years', -816),
+    ):
+      with self.subTest(name=name, num=num):
+        expected = [getattr(d, name)(num) for d in UnitTests.dates]
+        self.assertEqual(getattr(self.array, name)(num).to_dates(), expected)
+
+    # per-element offsets
+    nums = np.arange(len(UnitTests.dates))
+    expected = [d.add_months(int(n)) for d, n in zip(UnitTests.dates, nums)]
+    self.assertEqual(self.array.add_months(nums).to_dates(), expected)
+
+    with self.assertRaises(Exception):
+      EpiDateArray.from_ymd(1, 1, 1).add_months(-1)
+
+  def test_datetime64(self):
+    values = self.array.to_datetime64()
+    self.assertEqual(values.dtype, np.dtype('datetime64[D]'))
+    self.assertEqual([str(v) for v in values], [str(d) for d in UnitTests.dates])
+    self.assertEqual(EpiDateArray.from_datetime64(values), self.array)
+
+  def test_from_ymd(self):
+    array = EpiDateArray.from_ymd([2016, 2017], [2, 11], [29, 14])
+    self.assertEqual(array.to_dates(), [EpiDate(2016, 2, 29), EpiDate(2017, 11, 14)])
+    for y, m, d in ((2017, 2, 29), (0, 1, 1), (2017, 13, 1), (2017, 4, 31)):
+      with self.subTest(y=y, m=m, d=d):
+        with self.assertRaises(Exception):
+          EpiDateArray.from_ymd([2017, y], [1, m], [1, d])
+
+  def test_strings(self):
+    strs = self.array.to_strings()
+    self.assertEqual(strs, [str(d) for d in UnitTests.dates])
+    self.assertEqual(EpiDateArray.from_strings(strs), self.array)
+    strs = ['2017-01-01', '2017/01/01', '20170101']
+    expected = [EpiDate(2017, 1, 1)] * 3
+    self.assertEqual(EpiDateArray.from_strings(strs).to_dates(), expected)
+    self.assertEqual(len(EpiDateArray.from_strings([])), 0)
+    for s in ('2017-1-1', '2017-01-0x', '20170230', 'not a date'):
+      with self.subTest(s=s):
+        with self.assertRaises(Exception):
+          EpiDateArray.from_strings(['20170101', s])
+
+  def test_from_epiweek(self):
+    epiweeks = [200652, 200701, 200853, 201453, 201746]
+    expected = [EpiDate.from_epiweek(ew // 100, ew % 100) for ew in epiweeks]
+    self.assertEqual(EpiDateArray.from_epiweek(epiweeks).to_dates(), expected)
+    self.assertEqual(EpiDateArray.from_epiweek(201746)[0], expected[-1])
+    with self.assertRaises(Exception):
+      EpiDateArray.from_epiweek([201753])
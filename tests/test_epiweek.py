@@ -1,6 +1,7 @@
 """Unit tests for epiweek.py."""
 
 # standard library
+import pickle
 import unittest
 
 # py3tester coverage target
@@ -53,6 +54,39 @@ class FunctionTests(unittest.TestCase):
       check_epiweek(201753)
     self.assertFalse(check_epiweek(201753, fatal=False))
 
+  def test_float_epiweeks(self):
+    # e.g. epiweeks read from a pandas column containing NaN
+    self.assertTrue(check_epiweek(201744.0))
+    self.assertTrue(check_epiweek(201453.0))
+    self.assertFalse(check_epiweek(201753.0, fatal=False))
+    self.assertEqual(get_num_weeks(2014.0), 53)
+    self.assertEqual(add_epiweeks(201744.0, 1), 201745.0)
+    self.assertEqual(add_epiweeks(201501.0, -1), 201453.0)
+    self.assertEqual(delta_epiweeks(201744.0, 201801.0), 9)
+    self.assertEqual(epiweek_to_ordinal(201744.0), epiweek_to_ordinal(201744))
+
+  def test_validate_epiweeks(self):
+    epiweeks = [201744, 201753, 201453, 201700, 52, '201744', 201744.0, 210001]
+    expected = [True, False, True, False, False, False, False, True]
+    self.assertEqual(validate_epiweeks(epiweeks), expected)
+    self.assertEqual(validate_epiweeks(iter(epiweeks), count=True), (expected, 3))
+
+    failures = validate_epiweeks(epiweeks, failures=True)
+    self.assertEqual(failures, [
+      (1, 'week out of range'),
+      (3, 'week out of range'),
+      (4, 'year out of range'),
+      (5, 'not an integer'),
+      (6, 'not an integer'),
+    ])
+    self.assertEqual(validate_epiweeks([201744], failures=True, count=True), ([], 1))
+    self.assertEqual(validate_epiweeks([]), [])
+
+    # agrees with check_epiweek
+    for ew in list(range(201600, 201800)) + [189953, 210053, 220053]:
+      with self.subTest(ew=ew):
+        self.assertEqual(validate_epiweeks([ew])[0], check_epiweek(ew, fatal=False))
+
   def test_get_num_weeks(self):
     long_years = set([1997, 2003, 2008, 2014, 2020])
     for year in range(min(long_years) - 1, max(long_years) + 2):
@@ -60,11 +94,55 @@ class FunctionTests(unittest.TestCase):
         num_weeks = 53 if year in long_years else 52
         self.assertEqual(get_num_weeks(year), num_weeks)
 
+    # years outside of the precomputed table
+    for year, num_weeks in ((1, 52), (1896, 53), (1899, 52), (2100, 52), (2200, 53), (9998, 52)):
+      with self.subTest(year=year):
+        self.assertEqual(get_num_weeks(year), num_weeks)
+
+    # there are 20871 epiweeks in every 400 year cycle
+    self.assertEqual(sum(get_num_weeks(y) for y in range(1, 401)), 20871)
+    self.assertEqual(sum(get_num_weeks(y) for y in range(2000, 2400)), 20871)
+
+    with self.assertRaises(Exception):
+      get_num_weeks(0)
+
   def test_add_epiweeks(self):
     for ew1, delta, ew2 in FunctionTests.sample_ranges:
       with self.subTest(ew1=ew1, delta=delta, ew2=ew2):
         self.assertEqual(add_epiweeks(ew1, delta), ew2)
 
+  def test_epiweek_to_ordinal(self):
+    self.assertEqual(epiweek_to_ordinal(join_epiweek(FIRST_YEAR, 1)), 0)
+    self.assertEqual(epiweek_to_ordinal(190002), 1)
+    for ew1, delta, ew2 in FunctionTests.sample_ranges:
+      with self.subTest(ew1=ew1, delta=delta, ew2=ew2):
+        ord1, ord2 = epiweek_to_ordinal(ew1), epiweek_to_ordinal(ew2)
+        self.assertEqual(ord2 - ord1, delta)
+    with self.assertRaises(Exception):
+      epiweek_to_ordinal(201753)
+
+  def test_ordinal_to_epiweek(self):
+    # every epiweek in the supported range round-trips
+    ordinal = 0
+    for year in range(FIRST_YEAR, LAST_YEAR):
+      for week in range(1, get_num_weeks(year) + 1):
+        ew = join_epiweek(year, week)
+        with self.subTest(ew=ew):
+          self.assertEqual(epiweek_to_ordinal(ew), ordinal)
+          self.assertEqual(ordinal_to_epiweek(ordinal), ew)
+        ordinal += 1
+
+    # beyond the precomputed table
+    self.assertEqual(ordinal_to_epiweek(-1), 189952)
+    self.assertEqual(ordinal_to_epiweek(ordinal), join_epiweek(LAST_YEAR, 1))
+    for ew in (101, 102, 180053, 189952, 210001, 999952):
+      with self.subTest(ew=ew):
+        self.assertEqual(ordinal_to_epiweek(epiweek_to_ordinal(ew)), ew)
+
+    # before year 1
+    with self.assertRaises(Exception):
+      ordinal_to_epiweek(epiweek_to_ordinal(101) - 1)
+
   def test_get_season(self):
     for ew, y1, y2 in (
       (201744, 201740, 201820),
@@ -81,6 +159,8 @@ class FunctionTests(unittest.TestCase):
     # invalid epiweek
     with self.assertRaises(Exception):
       get_season(201553)
+    with self.assertRaises(Exception):
+      get_season(40)
 
     # custom handler for offseason
     x, y = 'arbitrary', 'result'
@@ -125,3 +205,121 @@ class FunctionTests(unittest.TestCase):
     v2 = [i for i in range(201453, 201400, -1)]
     v3 = [i for i in range(201352, 201300, -1)]
     self.assertEqual(actual, v1 + v2 + v3)
+
+
+class EpiweekRangeTests(unittest.TestCase):
+  """Tests the EpiweekRange sequence."""
+
+  def test_matches_range_epiweeks(self):
+    for args, kwargs in (
+      ((201744,), {'stop': 201744}),
+      ((201744,), {'stop': 201744, 'inclusive': True}),
+      ((201744,), {'num': 0, 'inclusive': True}),
+      ((201744,), {'num': -1}),
+      ((201744, 201743), {'inclusive': True}),
+      ((201552, 201301), {'inclusive': True}),
+      ((201301, 201552), {}),
+      ((199740,), {'num': 1048}),
+    ):
+      with self.subTest(args=args, kwargs=kwargs):
+        ewr = EpiweekRange(*args, **kwargs)
+        expected = list(range_epiweeks(*args, **kwargs))
+        self.assertEqual(list(ewr), expected)
+        self.assertEqual(len(ewr), len(expected))
+        self.assertEqual(list(reversed(ewr)), expected[::-1])
+
+    with self.assertRaises(Exception):
+      EpiweekRange(201744)
+    with self.assertRaises(Exception):
+      EpiweekRange(201744, stop=201801, num=3)
+
+  def test_contains(self):
+    ewr = EpiweekRange(201440, stop=201520, inclusive=True)
+    for ew in (201440, 201453, 201501, 201520):
+      with self.subTest(ew=ew):
+        self.assertIn(ew, ewr)
+    for ew in (201439, 201521, 201454, 201500, 201553, None, 'x'):
+      with self.subTest(ew=ew):
+        self.assertNotIn(ew, ewr)
+    self.assertIn(201510, EpiweekRange(201520, stop=201440))
+    self.assertNotIn(201440, EpiweekRange(201520, stop=201440))
+
+  def test_getitem(self):
+    ewr = EpiweekRange(201450, num=10)
+    self.assertEqual(ewr[0], 201450)
+    self.assertEqual(ewr[3], 201453)
+    self.assertEqual(ewr[4], 201501)
+    self.assertEqual(ewr[-1], 201506)
+    with self.assertRaises(IndexError):
+      ewr[10]
+
+    # slices are ranges too
+    self.assertEqual(ewr[2:5], EpiweekRange(201452, num=3))
+    self.assertEqual(list(ewr[::3]), [201450, 201453, 201503, 201506])
+    self.assertEqual(list(ewr[::-4]), [201506, 201502, 201451])
+    self.assertEqual(ewr[::3].step, 3)
+    self.assertEqual(len(ewr[5:5]), 0)
+
+  def test_index_and_count(self):
+    ewr = EpiweekRange(201450, num=10)
+    self.assertEqual(ewr.index(201450), 0)
+    self.assertEqual(ewr.index(201501), 4)
+    self.assertEqual(ewr[::2].index(201503), 3)
+    with self.assertRaises(ValueError):
+      ewr.index(201507)
+    with self.assertRaises(ValueError):
+      ewr[::2].index(201451)
+    self.assertEqual(ewr.count(201453), 1)
+    self.assertEqual(ewr.count(201507), 0)
+
+  def test_equality(self):
+    a = EpiweekRange(201740, stop=201820)
+    b = EpiweekRange(201740, num=32)
+    self.assertEqual(a, b)
+    self.assertEqual(hash(a), hash(b))
+    self.assertNotEqual(a, EpiweekRange(201740, num=33))
+    self.assertEqual(EpiweekRange(201740, num=0), EpiweekRange(201001, num=0))
+
+
+class PartitionTests(unittest.TestCase):
+  """Tests partitioning ranges of epiweeks."""
+
+  def test_uniform(self):
+    chunks = partition_epiweeks(201440, 201540, 4)
+    self.assertEqual([len(c) for c in chunks], [13, 13, 14, 13])
+    self.assertEqual(chunks[0], EpiweekRange(201440, num=13))
+    self.assertEqual(chunks[-1][-1], 201539)
+    epiweeks = [ew for chunk in chunks for ew in chunk]
+    self.assertEqual(epiweeks, list(range_epiweeks(201440, 201540)))
+
+    # inclusive, and more chunks than epiweeks
+    chunks = partition_epiweeks(201752, 201801, 5, inclusive=True)
+    expected = [EpiweekRange(201752, num=1), EpiweekRange(201801, num=1)]
+    self.assertEqual(chunks, expected)
+    self.assertEqual(partition_epiweeks(201801, 201801, 3), [])
+
+  def test_cost(self):
+    # in-season epiweeks are ten times as expensive
+    def cost(ew):
+      return 1 if get_season(ew)[0] is None else 10
+    chunks = partition_epiweeks(201701, 201901, 4, cost=cost)
+    costs = [sum(map(cost, chunk)) for chunk in chunks]
+    self.assertEqual(sum(costs), sum(map(cost, range_epiweeks(201701, 201901))))
+    self.assertLessEqual(max(costs) - min(costs), 10)
+
+  def test_seasons(self):
+    chunks = partition_epiweeks(201401, 201801, 3, seasons=True)
+    self.assertEqual([c[0] for c in chunks], [201401, 201540, 201640])
+    # every season boundary is used when there are enough chunks
+    chunks = partition_epiweeks(201401, 201801, 10, seasons=True)
+    self.assertEqual([c[0] for c in chunks], [201401, 201440, 201540, 201640, 201740])
+
+  def test_pickle(self):
+    chunks = partition_epiweeks(201440, 201540, 2)
+    self.assertEqual(pickle.loads(pickle.dumps(chunks)), chunks)
+
+  def test_invalid(self):
+    with self.assertRaises(Exception):
+      partition_epiweeks(201440, 201540, 0)
+    with self.assertRaises(Exception):
+      partition_epiweeks(201540, 201440, 2)
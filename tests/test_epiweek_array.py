@@ -0,0 +1,253 @@
+"""Unit tests for epiweek_array.py."""
+
+# standard library
+import unittest
+
+# third party
+import numpy as np
+
+# first party
+import delphi.utils.epiweek as utils_epiweek
+
+# py3tester coverage target
+__test_target__ = 'delphi.utils.epiweek_array'
+
+
+class FunctionTests(unittest.TestCase):
+  """Tests each function individually."""
+
+  epiweeks = np.array([199740, 201744, 202727, 201453, 201501, 201652])
+  invalid = np.array([201700, 201753, 52, 190054])
+
+  def test_split_epiweek(self):
+    years, weeks = split_epiweek(FunctionTests.epiweeks)
+    for ew, year, week in zip(FunctionTests.epiweeks, years, weeks):
+      with self.subTest(ew=ew):
+        self.assertEqual((year, week), utils_epiweek.split_epiweek(ew))
+
+  def test_join_epiweek(self):
+    years, weeks = split_epiweek(FunctionTests.epiweeks)
+    actual = join_epiweek(years, weeks)
+    self.assertEqual(list(actual), list(FunctionTests.epiweeks))
+    self.assertEqual(list(join_epiweek(years, 1)), list(years * 100 + 1))
+
+  def test_check_epiweek(self):
+    self.assertTrue(np.all(check_epiweek(FunctionTests.epiweeks)))
+    self.assertFalse(np.any(check_epiweek(FunctionTests.invalid)))
+    mixed = np.concatenate((FunctionTests.epiweeks, FunctionTests.invalid))
+    expected = [True] * 6 + [False] * 4
+    self.assertEqual(list(check_epiweek(mixed)), expected)
+
+  def test_get_num_weeks(self):
+    years = np.arange(1990, 2030)
+    expected = [utils_epiweek.get_num_weeks(y) for y in years]
+    self.assertEqual(list(get_num_weeks(years)), expected)
+    with self.assertRaises(Exception):
+      get_num_weeks([2017, 0])
+
+  def test_ordinals(self):
+    ordinals = epiweek_to_ordinal(FunctionTests.epiweeks)
+    expected = [utils_epiweek.epiweek_to_ordinal(ew) for ew in FunctionTests.epiweeks]
+    self.assertEqual(list(ordinals), expected)
+    actual = ordinal_to_epiweek(ordinals)
+    self.assertEqual(list(actual), list(FunctionTests.epiweeks))
+    with self.assertRaises(Exception):
+      epiweek_to_ordinal(FunctionTests.invalid)
+    with self.assertRaises(Exception):
+      ordinal_to_epiweek([0, utils_epiweek.epiweek_to_ordinal(101) - 1])
+
+  def test_outside_of_table(self):
+    # epiweeks before FIRST_YEAR and after LAST_YEAR match the scalar API
+    epiweeks = np.array([101, 189952, 189653, 210001, 240052, 999952])
+    self.assertTrue(np.all(check_epiweek(epiweeks)))
+    years = split_epiweek(epiweeks)[0]
+    expected = [utils_epiweek.get_num_weeks(y) for y in years]
+    self.assertEqual(list(get_num_weeks(years)), expected)
+    ordinals = epiweek_to_ordinal(epiweeks)
+    expected = [utils_epiweek.epiweek_to_ordinal(ew) for ew in epiweeks]
+    self.assertEqual(list(ordinals), expected)
+    self.assertEqual(list(ordinal_to_epiweek(ordinals)), list(epiweeks))
+    actual = add_epiweeks(epiweeks, 60)
+    expected = [utils_epiweek.add_epiweeks(ew, 60) for ew in epiweeks]
+    self.assertEqual(list(actual), expected)
+
+  def test_add_epiweeks(self):
+    # scalar offset
+    actual = add_epiweeks(FunctionTests.epiweeks, 60)
+    expected = [utils_epiweek.add_epiweeks(ew, 60) for ew in FunctionTests.epiweeks]
+    self.assertEqual(list(actual), expected)
+
+    # per-element offsets
+    deltas = np.array([0, 1, -1, 1048, -1180, 3])
+    actual = add_epiweeks(FunctionTests.epiweeks, deltas)
+    expected = [
+      utils_epiweek.add_epiweeks(ew, i)
+      for ew, i in zip(FunctionTests.epiweeks, deltas)
+    ]
+    self.assertEqual(list(actual), expected)
+
+  def test_delta_epiweeks(self):
+    other = np.roll(FunctionTests.epiweeks, 1)
+    actual = delta_epiweeks(FunctionTests.epiweeks, other)
+    expected = [
+      utils_epiweek.delta_epiweeks(a, b)
+      for a, b in zip(FunctionTests.epiweeks, other)
+    ]
+    self.assertEqual(list(actual), expected)
+    self.assertEqual(list(delta_epiweeks(201744, [201744, 201801])), [0, 9])
+
+  def test_get_season(self):
+    epiweeks = np.array([201744, 199740, 199820, 201453, 201430])
+    starts, ends = get_season(epiweeks)
+    self.assertEqual(list(starts), [201740, 199740, 199740, 201440, 0])
+    self.assertEqual(list(ends), [201820, 199820, 199820, 201520, 0])
+    starts, ends = get_season(epiweeks, fill=-1)
+    self.assertEqual(starts[-1], -1)
+    self.assertEqual(ends[-1], -1)
+    with self.assertRaises(Exception):
+      get_season([201553])
+
+
+class SeasonMatrixTests(unittest.TestCase):
+  """Tests the season matrix transform and its inverse."""
+
+  def test_get_season_column(self):
+    epiweeks = [201440, 201453, 201501, 201520, 201439, 201521]
+    actual = get_season_column(epiweeks, 2014)
+    self.assertEqual(list(actual), [0, 13, 14, 33, -1, 34])
+    actual = season_column_to_epiweek(2014, actual)
+    self.assertEqual(list(actual), epiweeks)
+    # week 53 has a column even when it doesn't exist
+    self.assertEqual(season_column_to_epiweek(2015, 13), 201553)
+
+  def test_to_season_matrix(self):
+    # 2014 has 53 weeks and 2015 has 52
+    epiweeks = [201440, 201453, 201520, 201540, 201601, 201630]
+    values = [1, 2, 3, 4, 5, 6]
+    seasons, columns, matrix = to_season_matrix(epiweeks, values)
+    self.assertEqual(list(seasons), [2014, 2015])
+    self.assertEqual(list(columns), list(range(SEASON_COLUMNS)))
+    self.assertEqual(matrix.shape, (2, SEASON_COLUMNS))
+    self.assertEqual(matrix[0, 0], 1)
+    self.assertEqual(matrix[0, 13], 2)
+    self.assertEqual(matrix[0, 33], 3)
+    self.assertEqual(matrix[1, 0], 4)
+    self.assertTrue(np.isnan(matrix[1, 13]))
+    self.assertEqual(matrix[1, 14], 5)
+    self.assertEqual(np.count_nonzero(~np.isnan(matrix)), 5)
+
+  def test_seasons_are_contiguous(self):
+    seasons, _, matrix = to_season_matrix([201001, 201301], [1, 2], fill=0)
+    self.assertEqual(list(seasons), [2009, 2010, 2011, 2012])
+    self.assertEqual(matrix.dtype, np.int64)
+    self.assertEqual(list(matrix.sum(axis=1)), [1, 0, 0, 2])
+
+  def test_trailing_dimensions(self):
+    values = np.array([[1, 2, 3], [4, 5, 6]])
+    seasons, columns, matrix = to_season_matrix([201740, 201801], values)
+    self.assertEqual(matrix.shape, (1, SEASON_COLUMNS, 3))
+    self.assertEqual(list(matrix[0, 0]), [1, 2, 3])
+    self.assertEqual(list(matrix[0, 14]), [4, 5, 6])
+    epiweeks, actual = from_season_matrix(seasons, columns, matrix)
+    self.assertEqual(actual.shape, (33, 3))
+
+  def test_offseason(self):
+    epiweeks = [201740, 201730, 201830]
+    _, columns, matrix = to_season_matrix(epiweeks, [1, 2, 3])
+    self.assertEqual(list(columns), list(range(SEASON_COLUMNS)))
+    self.assertEqual(np.count_nonzero(~np.isnan(matrix)), 1)
+
+    # assign the off-season to the season which precedes it
+    def offseason(ew):
+      return utils_epiweek.get_season(utils_epiweek.add_epiweeks(ew, -20))
+    seasons, columns, matrix = to_season_matrix(epiweeks, [1, 2, 3], offseason)
+    self.assertEqual(list(seasons), [2016, 2017])
+    self.assertEqual(list(columns), list(range(44)))
+    self.assertEqual(matrix[0, 43], 2)
+    self.assertEqual(matrix[1, 0], 1)
+    self.assertEqual(matrix[1, 43], 3)
+
+    # assign the off-season to the season which follows it
+    def offseason(ew):
+      return utils_epiweek.get_season(utils_epiweek.add_epiweeks(ew, 20))
+    seasons, columns, matrix = to_season_matrix(epiweeks, [1, 2, 3], offseason)
+    self.assertEqual(list(seasons), [2017, 2018])
+    self.assertEqual(list(columns), list(range(-10, SEASON_COLUMNS)))
+    self.assertEqual(matrix[0, 0], 2)
+    self.assertEqual(matrix[0, 10], 1)
+    self.assertEqual(matrix[1, 0], 3)
+
+    with self.assertRaises(Exception):
+      to_season_matrix(epiweeks, [1, 2, 3], lambda ew: (ew, ew))
+
+  def test_round_trip(self):
+    epiweeks = np.array(list(utils_epiweek.range_epiweeks(201340, 201621)))
+    values = np.arange(len(epiweeks), dtype=float)
+    seasons, columns, matrix = to_season_matrix(epiweeks, values)
+    self.assertEqual(list(seasons), [2013, 2014, 2015])
+    # only 2014 has a week 53
+    self.assertEqual(list(np.argwhere(np.isnan(matrix))[:, 0]), [0, 2])
+    actual_epiweeks, actual_values = from_season_matrix(seasons, columns, matrix)
+    # week 53 of 2013 and 2015 are omitted, along with the off-season
+    self.assertEqual(len(actual_epiweeks), 3 * SEASON_COLUMNS - 2)
+    in_season = (epiweeks % 100 <= 20) | (epiweeks % 100 >= 40)
+    self.assertEqual(list(actual_epiweeks), list(epiweeks[in_season]))
+    self.assertEqual(list(actual_values), list(values[in_season]))
+
+  def test_empty(self):
+    seasons, columns, matrix = to_season_matrix(np.zeros(0, dtype=int), [])
+    self.assertEqual(matrix.shape, (0, SEASON_COLUMNS))
+    epiweeks, values = from_season_matrix(seasons, columns, matrix)
+    self.assertEqual(len(epiweeks), 0)
+    with self.assertRaises(Exception):
+      to_season_matrix([201740], [1, 2])
+
+
+class BackfillGridTests(unittest.TestCase):
+  """Tests backfill grid generation."""
+
+  @staticmethod
+  def expected(start, stop, max_lag=None, same_season=False):
+    """Return the grid as a list of triples, built with nested loops."""
+    rows = []
+    for issue in utils_epiweek.range_epiweeks(start, stop):
+      for ew in utils_epiweek.range_epiweeks(start, issue, inclusive=True):
+        lag = utils_epiweek.delta_epiweeks(ew, issue)
+        if max_lag is not None and lag > max_lag:
+          continue
+        if same_season:
+          season = utils_epiweek.get_season(ew)
+          if season[0] is None or season != utils_epiweek.get_season(issue):
+            continue
+        rows.append((issue, ew, lag))
+    return rows
+
+  def test_grid(self):
+    for max_lag in (None, 0, 3):
+      for same_season in (False, True):
+        with self.subTest(max_lag=max_lag, same_season=same_season):
+          args = (201430, 201610, max_lag, same_season)
+          issues, epiweeks, lags = get_backfill_grid(*args)
+          self.assertEqual(issues.dtype, np.int32)
+          actual = list(zip(issues, epiweeks, lags))
+          self.assertEqual(actual, BackfillGridTests.expected(*args))
+
+  def test_chunks(self):
+    expected = get_backfill_grid(201350, 201520, max_lag=10, same_season=True)
+    chunks = list(iter_backfill_grid(
+        201350, 201520, max_lag=10, same_season=True, chunk_size=25))
+    self.assertTrue(all(0 < len(chunk[0]) <= 25 for chunk in chunks))
+    for expected_array, actual_array in zip(expected, zip(*chunks)):
+      self.assertEqual(list(expected_array), list(np.concatenate(actual_array)))
+
+    # a chunk holds at least one issue, even if it's larger than chunk_size
+    chunks = list(iter_backfill_grid(201701, 201706, chunk_size=2))
+    self.assertEqual([len(chunk[0]) for chunk in chunks], [1, 2, 3, 4, 5])
+
+  def test_empty(self):
+    issues, epiweeks, lags = get_backfill_grid(201701, 201701)
+    self.assertEqual(len(issues), 0)
+    chunks = iter_backfill_grid(201725, 201730, same_season=True, chunk_size=5)
+    self.assertEqual(list(chunks), [])
+    with self.assertRaises(Exception):
+      get_backfill_grid(201701, 201710, max_lag=-1)
@@ -0,0 +1,81 @@
+"""Unit tests for epiweek_rollup.py."""
+
+# standard library
+import unittest
+
+# third party
+import numpy as np
+
+# first party
+from delphi.utils.epidate import EpiDate
+
+# py3tester coverage target
+__test_target__ = 'delphi.utils.epiweek_rollup'
+
+
+class UnitTests(unittest.TestCase):
+  """Basic unit tests."""
+
+  def test_get_overlaps(self):
+    months = get_table('month')
+    # 2017-10-29 through 2017-11-04
+    expected = [(201710, 3 / 7), (201711, 4 / 7)]
+    self.assertEqual(months.get_overlaps(201744), expected)
+    self.assertEqual(months.get_overlaps(201745), [(201711, 1.0)])
+    # 2017-12-31 through 2018-01-06
+    expected = [(201712, 1 / 7), (201801, 6 / 7)]
+    self.assertEqual(months.get_overlaps(201801), expected)
+    quarters = get_table('quarter')
+    self.assertEqual(quarters.get_overlaps(201744), [(20174, 1.0)])
+    expected = [(20174, 1 / 7), (20181, 6 / 7)]
+    self.assertEqual(quarters.get_overlaps(201801), expected)
+    seasons = get_table('season')
+    self.assertEqual(seasons.get_overlaps(201801), [(201740, 1.0)])
+    self.assertEqual(seasons.get_overlaps(201730), [])
+
+  def test_matches_epidate(self):
+    table = get_table('month')
+    for ew in (190001, 195327, 201453, 209952):
+      with self.subTest(ew=ew):
+        first_day = EpiDate.from_epiweek(*divmod(ew, 100)).add_days(-3)
+        expected = {}
+        for i in range(7):
+          date = first_day.add_days(i)
+          month = date.year * 100 + date.month
+          expected[month] = expected.get(month, 0) + 1 / 7
+        actual = dict(table.get_overlaps(ew))
+        self.assertEqual(actual.keys(), expected.keys())
+        for month in expected:
+          self.assertAlmostEqual(actual[month], expected[month])
+
+  def test_lookup(self):
+    positions, periods, fractions = get_table('month').lookup([201745, 201744])
+    self.assertEqual(list(positions), [0, 1, 1])
+    self.assertEqual(list(periods), [201711, 201710, 201711])
+    self.assertEqual(list(fractions * 7), [7, 3, 4])
+
+  def test_rollup(self):
+    epiweeks = np.array([201743, 201744, 201745])
+    months, totals = rollup(epiweeks, np.array([7, 14, 7]))
+    self.assertEqual(list(months), [201710, 201711])
+    self.assertEqual(list(totals), [13, 15])
+
+    # trailing dimensions are kept
+    values = np.array([[7, 1], [14, 1], [7, 1]])
+    months, totals = rollup(epiweeks, values)
+    self.assertEqual(totals.shape, (2, 2))
+    self.assertAlmostEqual(totals[0, 1], 1 + 3 / 7)
+
+    # off-season epiweeks are ignored
+    epiweeks = [201720, 201730, 201740, 201801]
+    seasons, totals = rollup(epiweeks, [1, 2, 3, 4], 'season')
+    self.assertEqual(list(seasons), [201640, 201740])
+    self.assertEqual(list(totals), [1, 7])
+
+  def test_invalid(self):
+    with self.assertRaises(Exception):
+      get_table('year')
+    with self.assertRaises(Exception):
+      rollup([201744], [1, 2])
+    with self.assertRaises(Exception):
+      rollup([201753], [1])
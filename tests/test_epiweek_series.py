@@ -0,0 +1,99 @@
+"""Unit tests for epiweek_series.py."""
+
+# standard library
+import unittest
+
+# first party
+from delphi.utils.epiweek import EpiweekRange
+
+# py3tester coverage target
+__test_target__ = 'delphi.utils.epiweek_series'
+
+
+class UnitTests(unittest.TestCase):
+  """Basic unit tests."""
+
+  def test_lookup(self):
+    # 2014 has 53 epiweeks
+    series = EpiweekSeries(201452, [1, 2, 3, 4])
+    self.assertEqual(len(series), 4)
+    self.assertEqual(series.start, 201452)
+    self.assertEqual(series.stop, 201503)
+    self.assertEqual(series[201452], 1)
+    self.assertEqual(series[201453], 2)
+    self.assertEqual(series[201502], 4)
+    self.assertIn(201501, series)
+    self.assertNotIn(201503, series)
+    self.assertNotIn(201553, series)
+    self.assertIsNone(series.get(201451))
+    self.assertEqual(series.get(201451, 0), 0)
+    with self.assertRaises(KeyError):
+      series[201451]
+    self.assertEqual(series.epiweeks(), EpiweekRange(201452, stop=201503))
+    expected = [(201452, 1), (201453, 2), (201501, 3), (201502, 4)]
+    self.assertEqual(list(series.items()), expected)
+    with self.assertRaises(Exception):
+      EpiweekSeries(201553, [])
+
+  def test_lag_and_lead(self):
+    series = EpiweekSeries(201452, [1, 2, 3])
+    lagged = series.lag(2)
+    self.assertEqual(lagged.start, 201501)
+    self.assertEqual(lagged[201501], 1)
+    self.assertEqual(series.lead(2).start, 201450)
+    self.assertEqual(series.lead(2)[201450], 1)
+    self.assertEqual(series.lag(2).lead(2), series)
+
+  def test_reindex(self):
+    series = EpiweekSeries(201452, [1, 2, 3])
+    actual = series.reindex(EpiweekRange(201450, num=7))
+    self.assertEqual(actual, EpiweekSeries(201450, [None, None, 1, 2, 3, None, None]))
+    actual = series.reindex(EpiweekRange(201453, num=1), fill=0)
+    self.assertEqual(actual, EpiweekSeries(201453, [2]))
+    actual = series.reindex(EpiweekRange(201510, num=2), fill=0)
+    self.assertEqual(actual, EpiweekSeries(201510, [0, 0]))
+    self.assertEqual(len(series.reindex(EpiweekRange(201510, num=0))), 0)
+    with self.assertRaises(Exception):
+      series.reindex(EpiweekRange(201510, num=-2))
+
+  def test_fill(self):
+    series = EpiweekSeries(201740, [None, 1, None, None, 2, None])
+    self.assertEqual(series.fill(0).values, [0, 1, 0, 0, 2, 0])
+    self.assertEqual(series.fill(forward=True).values, [None, 1, 1, 1, 2, 2])
+    self.assertEqual(series.fill(0, forward=True).values, [0, 1, 1, 1, 2, 2])
+
+  def test_rolling(self):
+    series = EpiweekSeries(201752, [1, 2, 3, 4])
+    actual = series.rolling(2, sum)
+    self.assertEqual(actual, EpiweekSeries(201801, [3, 5, 7]))
+    self.assertEqual(len(series.rolling(5, sum)), 0)
+    with self.assertRaises(Exception):
+      series.rolling(0, sum)
+
+  def test_dicts(self):
+    values = {201452: 1, 201501: 3, 201502: 4}
+    series = EpiweekSeries.from_dict(values)
+    self.assertEqual(series, EpiweekSeries(201452, [1, None, 3, 4]))
+    self.assertEqual(series.to_dict(), values)
+    expected = {201452: 1, 201453: None, 201501: 3, 201502: 4}
+    self.assertEqual(series.to_dict(missing=True), expected)
+    self.assertEqual(EpiweekSeries.from_dict(values, fill=0)[201453], 0)
+    with self.assertRaises(Exception):
+      EpiweekSeries.from_dict({})
+
+  def test_align_and_join(self):
+    a = EpiweekSeries(201750, [1, 2, 3])
+    b = EpiweekSeries(201752, [4, 5])
+    outer = EpiweekSeries.align(a, b)
+    self.assertEqual(outer[0], EpiweekSeries(201750, [1, 2, 3, None]))
+    self.assertEqual(outer[1], EpiweekSeries(201750, [None, None, 4, 5]))
+    inner = EpiweekSeries.align(a, b, inner=True)
+    self.assertEqual(inner, [EpiweekSeries(201752, [3]), EpiweekSeries(201752, [4])])
+    self.assertEqual(EpiweekSeries.align(), [])
+
+    joined = EpiweekSeries.join(a, b, fill=0)
+    self.assertEqual(joined, EpiweekSeries(201750, [(1, 0), (2, 0), (3, 4), (0, 5)]))
+    joined = EpiweekSeries.join(a, b.lag(10), inner=True)
+    self.assertEqual(len(joined), 0)
+    with self.assertRaises(Exception):
+      EpiweekSeries.join()
@@ -0,0 +1,507 @@
+"""Unit tests for extractor.py."""
+
+# standard library
+import contextlib
+import gzip
+import io
+import json
+import os
+import tarfile
+import tempfile
+import unittest
+from unittest import mock
+import warnings
+import zipfile
+
+# py3tester coverage target
+__test_target__ = 'delphi.utils.extractor'
+
+
+def add_tar_file(tf, name, data, mtime=1500000000):
+  """Add a regular file to an open tar file."""
+  info = tarfile.TarInfo(name)
+  info.size = len(data)
+  info.mtime = mtime
+  tf.addfile(info, io.BytesIO(data))
+
+
+def add_tar_dir(tf, name, mode=0o755, mtime=1500000000):
+  """Add a directory to an open tar file."""
+  info = tarfile.TarInfo(name)
+  info.type = tarfile.DIRTYPE
+  info.mode = mode
+  info.mtime = mtime
+  tf.addfile(info)
+
+
+def add_tar_symlink(tf, name, target):
+  """Add a symbolic link to an open tar file."""
+  info = tarfile.TarInfo(name)
+  info.type = tarfile.SYMTYPE
+  info.linkname = target
+  tf.addfile(info)
+
+
+def make_read_only_tar(filename):
+  """Write a tar file containing a read-only directory with files in it."""
+  with tarfile.open(filename, 'w') as tf:
+    add_tar_dir(tf, 'd', mode=0o555, mtime=1400000000)
+    add_tar_dir(tf, 'd/e', mode=0o500, mtime=1300000000)
+    add_tar_file(tf, 'd/a.csv', b'a')
+    add_tar_file(tf, 'd/e/b.csv', b'b')
+
+
+def check_read_only_tar(test, destdir):
+  """Check the attributes of the directories extracted from the tar file."""
+  expected = {
+    os.path.join('d', 'a.csv'): b'a',
+    os.path.join('d', 'e', 'b.csv'): b'b',
+  }
+  test.assertEqual(list_files(destdir), expected)
+  for name, mode, mtime in (('d', 0o555, 1400000000), ('d/e', 0o500, 1300000000)):
+    stat = os.stat(os.path.join(destdir, name))
+    test.assertEqual(stat.st_mode & 0o777, mode)
+    test.assertEqual(stat.st_mtime, mtime)
+
+
+def list_files(directory):
+  """
+  Return a {relative path: contents} dict of the files in a directory, other
+  than the extractor's manifest.
+  """
+  files = {}
+  for root, _, names in os.walk(directory):
+    for name in names:
+      if name == _Manifest.NAME:
+        continue
+      path = os.path.join(root, name)
+      with open(path, 'rb') as f:
+        files[os.path.relpath(path, directory)] = f.read()
+  return files
+
+
+class ArchiveTestCase(unittest.TestCase):
+  """Base class providing a temporary directory and silencing output."""
+
+  def setUp(self):
+    tempdir = tempfile.TemporaryDirectory()
+    self.addCleanup(tempdir.cleanup)
+    self.tempdir = tempdir.name
+    stdout = contextlib.redirect_stdout(io.StringIO())
+    stdout.__enter__()
+    self.addCleanup(stdout.__exit__, None, None, None)
+
+  def path(self, *names):
+    return os.path.join(self.tempdir, *names)
+
+
+class StreamTests(ArchiveTestCase):
+  """Tests single-pass extraction of tar files."""
+
+  def test_matches_extract(self):
+    filename = self.path('a.tgz')
+    with tarfile.open(filename, 'w:gz') as tf:
+      add_tar_file(tf, 'd/a.csv', b'a,1\n')
+      add_tar_file(tf, 'b.csv', b'b,2\n')
+    Extractor.extract(filename, self.path('out1'))
+    Extractor.extract(filename, self.path('out2'), stream=True)
+    expected = {os.path.join('d', 'a.csv'): b'a,1\n', 'b.csv': b'b,2\n'}
+    self.assertEqual(list_files(self.path('out1')), expected)
+    self.assertEqual(list_files(self.path('out2')), expected)
+
+  def test_read_only_directory(self):
+    filename = self.path('a.tar')
+    make_read_only_tar(filename)
+    destdir = self.path('out')
+    Extractor.extract(filename, destdir, stream=True)
+    check_read_only_tar(self, destdir)
+
+  def test_refuses_unsafe_members(self):
+    for unsafe in ('symlink', 'parent'):
+      with self.subTest(unsafe=unsafe):
+        filename = self.path('%s.tar' % unsafe)
+        with tarfile.open(filename, 'w') as tf:
+          add_tar_file(tf, 'good.csv', b'good')
+          if unsafe == 'symlink':
+            add_tar_symlink(tf, 'link', '/etc/passwd')
+          else:
+            add_tar_file(tf, '../evil.csv', b'evil')
+          add_tar_file(tf, 'after.csv', b'after')
+        destdir = self.path('out_%s' % unsafe)
+        with self.assertRaises(Exception):
+          Extractor.extract(filename, destdir, stream=True)
+        # only the member preceding the unsafe one was written
+        self.assertEqual(list_files(destdir), {'good.csv': b'good'})
+        self.assertFalse(os.path.exists(self.path('evil.csv')))
+
+
+class ParallelZipTests(ArchiveTestCase):
+  """Tests extracting zip files with a pool of workers."""
+
+  def make_zip(self, filename):
+    with zipfile.ZipFile(filename, 'w', zipfile.ZIP_DEFLATED) as zf:
+      for i in range(40):
+        name = 'd%d/sub/f%02d.csv' % (i % 3, i)
+        zf.writestr(name, ('%d,' % i) * (i * 50 + 1))
+      zf.writestr('empty/', '')
+      zf.writestr('dup.csv', 'first')
+      with warnings.catch_warnings():
+        # zipfile warns about the duplicate name
+        warnings.simplefilter('ignore')
+        zf.writestr('dup.csv', 'second')
+
+  def test_matches_single_process(self):
+    filename = self.path('a.zip')
+    self.make_zip(filename)
+    Extractor.extract(filename, self.path('out1'))
+    Extractor.extract(filename, self.path('out3'), workers=3)
+    expected = list_files(self.path('out1'))
+    self.assertEqual(len(expected), 41)
+    self.assertEqual(list_files(self.path('out3')), expected)
+    self.assertEqual(expected['dup.csv'], b'second')
+    self.assertTrue(os.path.isdir(self.path('out3', 'empty')))
+
+  def test_batches(self):
+    filename = self.path('a.zip')
+    self.make_zip(filename)
+    with zipfile.ZipFile(filename) as zf:
+      batches = Extractor._get_zip_batches(zf, 4)
+      names = sorted(name for batch in batches for name in batch)
+      self.assertEqual(names, sorted(set(zf.namelist())))
+      sizes = [
+        sum(zf.getinfo(name).compress_size for name in batch)
+        for batch in batches
+      ]
+      largest = max(info.compress_size for info in zf.infolist())
+      self.assertEqual(len(batches), 4)
+      self.assertLessEqual(max(sizes) - min(sizes), largest)
+      # more workers than members
+      self.assertEqual(len(Extractor._get_zip_batches(zf, 100)), 42)
+
+  def test_refuses_unsafe_members(self):
+    filename = self.path('bad.zip')
+    with zipfile.ZipFile(filename, 'w') as zf:
+      zf.writestr('good.csv', 'good')
+      zf.writestr('../evil.csv', 'evil')
+    destdir = self.path('out')
+    with self.assertRaises(Exception):
+      Extractor.extract(filename, destdir, workers=2)
+    self.assertFalse(os.path.exists(destdir))
+    self.assertFalse(os.path.exists(self.path('evil.csv')))
+
+
+class IncrementalTests(ArchiveTestCase):
+  """Tests incremental extraction using a manifest."""
+
+  def make_tar(self, filename, middle=b'value,1\n', extra=False):
+    # large enough that the middle member is outside the fingerprinted blocks
+    padding = os.urandom(1 << 21)
+    with tarfile.open(filename, 'w') as tf:
+      add_tar_file(tf, 'first.bin', padding)
+      add_tar_file(tf, 'mid.csv', middle)
+      add_tar_file(tf, 'last.bin', padding)
+      if extra:
+        add_tar_file(tf, 'new.csv', b'new')
+
+  def make_zip(self, filename, middle='value,1\n', extra=False):
+    with zipfile.ZipFile(filename, 'w') as zf:
+      zf.writestr('first.csv', 'first')
+      zf.writestr('mid.csv', middle)
+      zf.writestr('last.csv', 'last')
+      if extra:
+        zf.writestr('new.csv', 'new')
+
+  def extract(self, filename, destdir, workers=1):
+    """Extract incrementally, returning the output which was printed."""
+    with contextlib.redirect_stdout(io.StringIO()) as stdout:
+      Extractor.extract(filename, destdir, workers=workers, incremental=True)
+    return stdout.getvalue()
+
+  def get_mtimes(self, destdir):
+    return {
+      name: os.stat(os.path.join(destdir, name)).st_mtime_ns
+      for name in list_files(destdir)
+    }
+
+  def check_archive(self, kind, workers=1):
+    filename = self.path('a.%s' % kind)
+    destdir = self.path('out_%s_%d' % (kind, workers))
+    make = self.make_tar if kind == 'tar' else self.make_zip
+
+    # first run extracts everything
+    make(filename)
+    self.extract(filename, destdir, workers)
+    files = list_files(destdir)
+    self.assertEqual(files['mid.csv'], b'value,1\n')
+
+    # an unchanged archive is skipped entirely
+    self.assertIn('(unchanged)', self.extract(filename, destdir, workers))
+
+    # a tampered file is restored, and nothing else is rewritten
+    with open(os.path.join(destdir, 'mid.csv'), 'wb') as f:
+      f.write(b'tampered')
+    mtimes = self.get_mtimes(destdir)
+    self.extract(filename, destdir, workers)
+    self.assertEqual(list_files(destdir), files)
+    for name in ('first', 'last'):
+      name = '%s.%s' % (name, 'bin' if kind == 'tar' else 'csv')
+      self.assertEqual(self.get_mtimes(destdir)[name], mtimes[name])
+
+    # a member changed without changing the archive's size is re-extracted
+    size = os.path.getsize(filename)
+    make(filename, b'value,2\n' if kind == 'tar' else 'value,2\n')
+    self.assertEqual(os.path.getsize(filename), size)
+    self.assertNotIn('(unchanged)', self.extract(filename, destdir, workers))
+    self.assertEqual(list_files(destdir)['mid.csv'], b'value,2\n')
+
+    # an added member is extracted
+    make(filename, extra=True)
+    self.extract(filename, destdir, workers)
+    self.assertEqual(list_files(destdir)['new.csv'], b'new')
+    self.assertEqual(list_files(destdir)['mid.csv'], b'value,1\n')
+
+  def test_tar(self):
+    self.check_archive('tar')
+
+  def test_zip(self):
+    self.check_archive('zip')
+    self.check_archive('zip', workers=2)
+
+  def test_resume(self):
+    filename = self.path('a.zip')
+    destdir = self.path('out')
+    self.make_zip(filename)
+    self.extract(filename, destdir)
+    # simulate an interruption after the first member: drop the later
+    # entries and the completion marker, leaving a partial last line
+    manifest = os.path.join(destdir, _Manifest.NAME)
+    with open(manifest) as f:
+      lines = f.read().splitlines()
+    with open(manifest, 'w') as f:
+      f.write('\n'.join(lines[:2]) + '\n{"name": "mi')
+    os.remove(os.path.join(destdir, 'last.csv'))
+    mtimes = self.get_mtimes(destdir)
+    self.extract(filename, destdir)
+    self.assertEqual(
+      list_files(destdir),
+      {'first.csv': b'first', 'mid.csv': b'value,1\n', 'last.csv': b'last'})
+    # the member recorded before the interruption wasn't rewritten
+    self.assertEqual(
+      self.get_mtimes(destdir)['first.csv'], mtimes['first.csv'])
+    self.assertTrue(_Manifest(destdir).complete)
+
+  def test_read_only_directory(self):
+    filename = self.path('a.tar')
+    make_read_only_tar(filename)
+    destdir = self.path('out')
+    self.extract(filename, destdir)
+    check_read_only_tar(self, destdir)
+    # extract again into the existing read-only directories
+    os.remove(os.path.join(destdir, 'd', 'e', 'b.csv'))
+    self.extract(filename, destdir)
+    check_read_only_tar(self, destdir)
+
+  def test_no_partial_files(self):
+    filename = self.path('a.tar')
+    with tarfile.open(filename, 'w') as tf:
+      add_tar_file(tf, 'a.csv', b'a')
+      add_tar_file(tf, 'big.bin', bytes(3 << 20))
+    # cut the archive off partway through the big member
+    with open(filename, 'r+b') as f:
+      f.truncate(2 << 20)
+    destdir = self.path('out')
+    with self.assertRaises(Exception):
+      self.extract(filename, destdir)
+    self.assertEqual(list_files(destdir), {'a.csv': b'a'})
+    self.assertEqual(sorted(os.listdir(destdir)), [_Manifest.NAME, 'a.csv'])
+
+  def test_parallel_progress(self):
+    filename = self.path('a.zip')
+    with zipfile.ZipFile(filename, 'w') as zf:
+      for i in range(40):
+        zf.writestr('f%02d.csv' % i, '%d' % i)
+    batches = []
+    get_zip_batches = Extractor._get_zip_batches
+    def spy(*args):
+      result = get_zip_batches(*args)
+      batches.extend(result)
+      return result
+    with mock.patch.object(Extractor, '_get_zip_batches', side_effect=spy):
+      self.extract(filename, self.path('out'), workers=2)
+    # progress is recorded after each of many small batches, rather than
+    # after each worker's share of the archive
+    self.assertEqual(len(batches), 32)
+    self.assertLessEqual(max(len(batch) for batch in batches), 2)
+
+
+class IterMembersTests(ArchiveTestCase):
+  """Tests reading archive members without extracting them."""
+
+  def read_members(self, filename, pattern=None):
+    return [
+      (name, f.read())
+      for name, f in Extractor.iter_members(filename, pattern)
+    ]
+
+  def test_tar_and_zip(self):
+    tar_filename = self.path('a.tgz')
+    with tarfile.open(tar_filename, 'w:gz') as tf:
+      add_tar_file(tf, 'd/a.csv', b'a,1\n')
+      add_tar_file(tf, 'b.txt', b'b')
+      add_tar_file(tf, 'c.csv', b'c,3\n')
+    zip_filename = self.path('a.zip')
+    with zipfile.ZipFile(zip_filename, 'w') as zf:
+      zf.writestr('d/', '')
+      zf.writestr('d/a.csv', 'a,1\n')
+      zf.writestr('b.txt', 'b')
+      zf.writestr('c.csv', 'c,3\n')
+    for filename in (tar_filename, zip_filename):
+      with self.subTest(filename=os.path.basename(filename)):
+        expected = [('d/a.csv', b'a,1\n'), ('b.txt', b'b'), ('c.csv', b'c,3\n')]
+        self.assertEqual(self.read_members(filename), expected)
+        expected = [('d/a.csv', b'a,1\n'), ('c.csv', b'c,3\n')]
+        self.assertEqual(self.read_members(filename, '*.csv'), expected)
+        self.assertEqual(self.read_members(filename, '*.json'), [])
+    # nothing was extracted
+    self.assertEqual(
+      sorted(os.listdir(self.tempdir)), ['a.tgz', 'a.zip'])
+
+  def test_refuses_unsafe_members(self):
+    tar_filename = self.path('bad.tar')
+    with tarfile.open(tar_filename, 'w') as tf:
+      add_tar_file(tf, 'good.csv', b'good')
+      add_tar_symlink(tf, 'link', '/etc/passwd')
+      add_tar_file(tf, 'after.csv', b'after')
+    members = Extractor.iter_members(tar_filename)
+    # members preceding the unsafe one are yielded
+    self.assertEqual(next(members)[0], 'good.csv')
+    with self.assertRaises(Exception):
+      next(members)
+
+    # zip files are checked before anything is yielded
+    zip_filename = self.path('bad.zip')
+    with zipfile.ZipFile(zip_filename, 'w') as zf:
+      zf.writestr('good.csv', 'good')
+      zf.writestr('../evil.csv', 'evil')
+    with self.assertRaises(Exception):
+      next(Extractor.iter_members(zip_filename))
+
+  def test_unknown_format(self):
+    filename = self.path('a.txt')
+    with open(filename, 'w') as f:
+      f.write('not an archive')
+    with self.assertRaises(Exception):
+      list(Extractor.iter_members(filename))
+
+
+class IndexTests(ArchiveTestCase):
+  """Tests extracting selected members of a tar file using an index."""
+
+  def get_tar_bytes(self, files, **kwargs):
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode='w', **kwargs) as tf:
+      for name, data in files.items():
+        add_tar_file(tf, name, data)
+    return buffer.getvalue()
+
+  def make_files(self, num=20):
+    return {
+      'd%d/f%02d.csv' % (i % 2, i): (('%d,' % i) * (i * 200 + 1)).encode()
+      for i in range(num)
+    }
+
+  def check_members(self, filename, files, names):
+    destdir = self.path('out_%d' % len(os.listdir(self.tempdir)))
+    Extractor.extract_members(filename, destdir, names)
+    expected = {os.path.join(*name.split('/')): files[name] for name in names}
+    self.assertEqual(list_files(destdir), expected)
+
+  def test_plain_and_gzip(self):
+    files = self.make_files()
+    data = self.get_tar_bytes(files)
+    for name, contents in (('a.tar', data), ('a.tar.gz', gzip.compress(data))):
+      with self.subTest(name=name):
+        filename = self.path(name)
+        with open(filename, 'wb') as f:
+          f.write(contents)
+        index = Extractor.build_index(filename)
+        self.assertEqual(set(index['members']), set(files))
+        self.assertEqual(index['checkpoints'], [[0, 0]])
+        self.assertTrue(os.path.exists(filename + '.index.json'))
+        self.check_members(filename, files, ['d1/f13.csv', 'd0/f00.csv'])
+
+  def test_checkpoints(self):
+    files = self.make_files()
+    data = self.get_tar_bytes(files)
+    # compress independent chunks, splitting the tar file at arbitrary offsets
+    chunk_size = 3001
+    chunks = [data[i:i + chunk_size] for i in range(0, len(data), chunk_size)]
+    filename = self.path('a.tar.gz')
+    with open(filename, 'wb') as f:
+      for chunk in chunks:
+        f.write(gzip.compress(chunk))
+    index = Extractor.build_index(filename, checkpoints=True, spacing=10000)
+    checkpoints = index['checkpoints']
+    self.assertGreater(len(checkpoints), 2)
+    self.assertLess(len(checkpoints), len(chunks))
+    uncompressed = [c[1] for c in checkpoints]
+    self.assertEqual(uncompressed, sorted(uncompressed))
+    for u in uncompressed:
+      self.assertEqual(u % chunk_size, 0)
+    for a, b in zip(uncompressed, uncompressed[1:]):
+      self.assertGreaterEqual(b - a, 10000)
+    self.check_members(filename, files, sorted(files))
+
+  def test_trailing_padding(self):
+    files = self.make_files(4)
+    data = self.get_tar_bytes(files)
+    filename = self.path('a.tar.gz')
+    with open(filename, 'wb') as f:
+      f.write(gzip.compress(data[:2000]))
+      f.write(gzip.compress(data[2000:]))
+      f.write(bytes(1024))
+    index = Extractor.build_index(filename, checkpoints=True, spacing=1)
+    self.assertEqual(len(index['checkpoints']), 2)
+    self.check_members(filename, files, ['d1/f03.csv'])
+
+  def test_long_names(self):
+    name = '/'.join(['directory%02d' % i for i in range(12)]) + '/f.csv'
+    self.assertGreater(len(name), 100)
+    files = {'a.csv': b'a', name: b'long', 'b.csv': b'b'}
+    data = self.get_tar_bytes(files, format=tarfile.GNU_FORMAT)
+    filename = self.path('a.tgz')
+    with open(filename, 'wb') as f:
+      f.write(gzip.compress(data))
+    self.check_members(filename, files, [name, 'b.csv'])
+
+  def test_stale_index(self):
+    filename = self.path('a.tar')
+    with open(filename, 'wb') as f:
+      f.write(self.get_tar_bytes({'a.csv': b'a'}))
+    Extractor.build_index(filename)
+    files = {'b.csv': b'b'}
+    with open(filename, 'wb') as f:
+      f.write(self.get_tar_bytes(files))
+    # make sure the archive looks modified even on coarse filesystem clocks
+    stat = os.stat(filename)
+    os.utime(filename, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    self.check_members(filename, files, ['b.csv'])
+    with open(filename + '.index.json') as f:
+      self.assertEqual(list(json.load(f)['members']), ['b.csv'])
+
+  def test_missing_member(self):
+    filename = self.path('a.tar')
+    with open(filename, 'wb') as f:
+      f.write(self.get_tar_bytes({'a.csv': b'a'}))
+    destdir = self.path('out')
+    with self.assertRaises(Exception):
+      Extractor.extract_members(filename, destdir, ['a.csv', 'missing.csv'])
+    # nothing was extracted
+    self.assertFalse(os.path.exists(destdir))
+
+  def test_unsupported_compression(self):
+    filename = self.path('a.tar.bz2')
+    with tarfile.open(filename, 'w:bz2') as tf:
+      add_tar_file(tf, 'a.csv', b'a')
+    with self.assertRaisesRegex(Exception, 'only uncompressed or gzip tar'):
+      Extractor.build_index(filename)
@@ -0,0 +1,150 @@
+"""Unit tests for season_cache.py."""
+
+# standard library
+import os
+import tempfile
+import unittest
+
+# py3tester coverage target
+__test_target__ = 'delphi.utils.season_cache'
+
+
+class UnitTests(unittest.TestCase):
+  """Basic unit tests."""
+
+  def setUp(self):
+    self.tempdir = tempfile.TemporaryDirectory()
+    self.directory = self.tempdir.name
+    self.calls = []
+
+  def tearDown(self):
+    self.tempdir.cleanup()
+
+  def compute(self, location, epiweek):
+    self.calls.append((location, epiweek))
+    return epiweek % 100 + (0.5 if location == 'pa' else 0)
+
+  def test_memoize(self):
+    cache = SeasonCache(self.directory, epiweek=201805)
+    func = cache.memoize(self.compute)
+    self.assertEqual(func.__name__, 'compute')
+    self.assertEqual(func('pa', 201744), 44.5)
+    self.assertEqual(func('pa', 201744), 44.5)
+    self.assertEqual(func('ny', 201744), 44)
+    self.assertEqual(self.calls, [('pa', 201744), ('ny', 201744)])
+    self.assertEqual((cache.num_hits, cache.num_misses), (1, 2))
+    stats = cache.get_stats()
+    self.assertEqual(stats['hits'], 1)
+    self.assertAlmostEqual(stats['hit_rate'], 1 / 3)
+
+  def test_closed_seasons_persist(self):
+    cache = SeasonCache(self.directory, epiweek=201805)
+    func = cache.memoize(self.compute)
+    # closed seasons, including the off-season, and the current season
+    for ew in (201640, 201720, 201730, 201740):
+      func('pa', ew)
+      func('new york', ew)
+    cache.flush()
+    files = sorted(os.listdir(self.directory))
+    self.assertEqual(files, ['201640.bin', '201721.bin'])
+
+    cache = SeasonCache(self.directory, epiweek=201805)
+    func = cache.memoize(self.compute)
+    self.calls = []
+    self.assertEqual(func('pa', 201720), 20.5)
+    self.assertEqual(func('new york', 201640), 40)
+    self.assertEqual(func('pa', 201730), 30.5)
+    self.assertEqual(func('pa', 201740), 40.5)
+    self.assertEqual(self.calls, [('pa', 201740)])
+    self.assertEqual(cache.num_loads, 2)
+
+  def test_lru(self):
+    cache = SeasonCache(self.directory, epiweek=201805, max_size=2)
+    for ew in (201801, 201802, 201801, 201803):
+      cache.put('pa', ew, ew)
+    self.assertEqual(cache.num_evictions, 1)
+    self.assertIsNone(cache.get('pa', 201802))
+    self.assertEqual(cache.get('pa', 201801), 201801)
+    self.assertEqual(cache.get('pa', 201803), 201803)
+    # open seasons are never written to disk
+    cache.flush()
+    self.assertEqual(os.listdir(self.directory), [])
+
+  def test_invalidate(self):
+    cache = SeasonCache(self.directory, epiweek=201805)
+    cache.put('pa', 201650, 1)
+    cache.put('pa', 201750, 2)
+    cache.put('pa', 201551, 3)
+    cache.flush()
+    cache.invalidate(201701)
+    cache.invalidate(201801)
+    self.assertIsNone(cache.get('pa', 201650))
+    self.assertIsNone(cache.get('pa', 201750))
+    self.assertEqual(os.listdir(self.directory), ['201540.bin'])
+    cache = SeasonCache(self.directory, epiweek=201805)
+    self.assertIsNone(cache.get('pa', 201650))
+    self.assertEqual(cache.get('pa', 201551), 3)
+
+  def test_invalid_file(self):
+    with open(os.path.join(self.directory, '201640.bin'), 'wb') as f:
+      f.write(b'not a season cache file')
+    cache = SeasonCache(self.directory, epiweek=201805)
+    with self.assertRaises(Exception):
+      cache.get('pa', 201701)
+    with self.assertRaises(Exception):
+      SeasonCache(self.directory, max_size=0)
+    with self.assertRaises(Exception):
+      SeasonCache(self.directory, max_seasons=0)
+
+  def test_non_numeric_values(self):
+    cache = SeasonCache(self.directory, epiweek=201805)
+    with self.assertRaises(Exception):
+      cache.get_or_compute(lambda location, epiweek: None, 'pa', 201744)
+    with self.assertRaises(Exception):
+      cache.put('pa', 201801, 'oops')
+    self.assertIsNone(cache.get('pa', 201744))
+    # a cached zero is a hit, not a miss
+    self.assertEqual(cache.get_or_compute(lambda *args: 0, 'pa', 201801), 0)
+    self.assertEqual(cache.get_or_compute(lambda *args: 1, 'pa', 201801), 0)
+    self.assertEqual(cache.num_hits, 1)
+
+  def test_no_temporary_files(self):
+    cache = SeasonCache(self.directory, epiweek=201805)
+    cache.put('pa', 201650, 1)
+    cache.flush()
+    cache.put('pa', 201651, 2)
+    cache.flush()
+    self.assertEqual(os.listdir(self.directory), ['201640.bin'])
+
+  def test_closed_season_lru(self):
+    cache = SeasonCache(self.directory, epiweek=201805, max_seasons=2)
+    cache.put('pa', 201440, 1)
+    cache.put('pa', 201540, 2)
+    cache.get('pa', 201440)
+    # loading a third season evicts the least recently used one, which is
+    # written to disk first
+    cache.put('pa', 201640, 3)
+    self.assertEqual(cache.get_stats()['closed_size'], 2)
+    self.assertEqual(cache.num_season_evictions, 1)
+    self.assertEqual(os.listdir(self.directory), ['201540.bin'])
+    self.assertEqual(cache.get('pa', 201540), 2)
+    self.assertEqual(cache.num_loads, 1)
+    cache.flush()
+    cache = SeasonCache(self.directory, epiweek=201805)
+    values = [cache.get('pa', ew) for ew in (201440, 201540, 201640)]
+    self.assertEqual(values, [1, 2, 3])
+
+  def test_concurrent_writers(self):
+    cache1 = SeasonCache(self.directory, epiweek=201805)
+    cache2 = SeasonCache(self.directory, epiweek=201805)
+    cache1.put('pa', 201640, 1)
+    cache2.put('ny', 201640, 2)
+    cache2.put('pa', 201641, 3)
+    cache1.flush()
+    cache2.flush()
+    # the second writer keeps the first writer's values
+    self.assertEqual(cache2.get('pa', 201640), 1)
+    cache = SeasonCache(self.directory, epiweek=201805)
+    self.assertEqual(cache.get('pa', 201640), 1)
+    self.assertEqual(cache.get('ny', 201640), 2)
+    self.assertEqual(cache.get('pa', 201641), 3)
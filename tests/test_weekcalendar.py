@@ -0,0 +1,99 @@
+"""Unit tests for weekcalendar.py."""
+
+# standard library
+import datetime
+import unittest
+
+# first party
+import delphi.utils.epiweek as utils_epiweek
+from delphi.utils.epidate import EpiDate
+
+# py3tester coverage target
+__test_target__ = 'delphi.utils.weekcalendar'
+
+
+class UnitTests(unittest.TestCase):
+  """Basic unit tests."""
+
+  def test_invalid_rule(self):
+    for week_start, first_week_day in ((-1, 4), (7, 4), (0, 0), (0, 8)):
+      with self.subTest(week_start=week_start, first_week_day=first_week_day):
+        with self.assertRaises(Exception):
+          WeekCalendar(week_start, first_week_day)
+
+  def test_mmwr(self):
+    # MMWR weeks are epiweeks
+    for year in (1, 1899, 1900, 2014, 2099, 2100, 2200):
+      with self.subTest(year=year):
+        self.assertEqual(MMWR.get_num_weeks(year), utils_epiweek.get_num_weeks(year))
+    for ew in (190001, 201453, 201744):
+      with self.subTest(ew=ew):
+        self.assertEqual(MMWR.week_to_ordinal(ew), utils_epiweek.epiweek_to_ordinal(ew))
+        index = EpiDate.from_epiweek(ew // 100, ew % 100).get_index()
+        self.assertEqual(MMWR.day_to_week(index), ew)
+        self.assertEqual(MMWR.week_to_day(ew), index - 3)
+
+  def test_iso(self):
+    # agrees with the standard library
+    start = datetime.date(1890, 1, 1).toordinal()
+    end = datetime.date(2110, 1, 1).toordinal()
+    for ordinal in range(start, end, 5):
+      date = datetime.date.fromordinal(ordinal)
+      year, week, _ = date.isocalendar()
+      with self.subTest(date=date):
+        self.assertEqual(ISO.day_to_week(ordinal - 1), year * 100 + week)
+    self.assertEqual(ISO.get_num_weeks(2015), 53)
+    self.assertEqual(ISO.get_num_weeks(2016), 52)
+    self.assertEqual(ISO.week_to_day(201801), datetime.date(2018, 1, 1).toordinal() - 1)
+
+  def test_custom(self):
+    # Monday weeks, where week 1 contains January 1
+    fiscal = WeekCalendar(week_start=1, first_week_day=1)
+    self.assertEqual(fiscal.get_first_day(2017), datetime.date(2016, 12, 26).toordinal() - 1)
+    self.assertEqual(fiscal.get_first_day(2018), datetime.date(2018, 1, 1).toordinal() - 1)
+    self.assertEqual(fiscal.get_num_weeks(2017), 53)
+
+    # every week of every year is seven days, and weeks are contiguous
+    for calendar in (fiscal, WeekCalendar(6, 7), WeekCalendar(3, 2, 2000, 2010)):
+      for year in range(1995, 2015):
+        with self.subTest(calendar=calendar, year=year):
+          num_weeks = calendar.get_num_weeks(year)
+          first = calendar.week_to_day(year * 100 + 1)
+          last = calendar.week_to_day(year * 100 + num_weeks)
+          self.assertEqual(last - first, (num_weeks - 1) * 7)
+          self.assertEqual(calendar.get_first_day(year + 1), last + 7)
+          self.assertEqual((first + 1) % 7, calendar.week_start)
+
+  def test_check_and_validate(self):
+    self.assertTrue(ISO.check_week(201553, 201601))
+    self.assertFalse(ISO.check_week(201653, fatal=False))
+    with self.assertRaises(Exception):
+      ISO.check_week(201653)
+    weeks = [201553, 201653, 52, 'x']
+    self.assertEqual(ISO.validate(weeks), [True, False, False, False])
+    self.assertEqual(ISO.validate(weeks, failures=True, count=True), ([
+      (1, 'week out of range'),
+      (2, 'year out of range'),
+      (3, 'not an integer'),
+    ], 1))
+
+  def test_ordinals(self):
+    calendar = WeekCalendar(1, 4, 2000, 2010)
+    for week in ISO.day_to_week(0), 199001, 200001, 200953, 201001, 202001:
+      with self.subTest(week=week):
+        ordinal = calendar.week_to_ordinal(week)
+        self.assertEqual(calendar.ordinal_to_week(ordinal), week)
+        self.assertEqual(ISO.week_to_day(week), calendar.week_to_day(week))
+    self.assertEqual(calendar.add_weeks(200953, 1), 201001)
+    self.assertEqual(calendar.delta_weeks(200953, 201101), 53)
+    with self.assertRaises(Exception):
+      calendar.ordinal_to_week(calendar.week_to_ordinal(101) - 1)
+
+  def test_convert(self):
+    # 2017-12-31 is a Sunday: the first day of MMWR week 201801, and the last
+    # day of ISO week 201752
+    self.assertEqual(MMWR.convert(201801, ISO), 201801)
+    self.assertEqual(MMWR.convert(201801, ISO, offset=0), 201752)
+    self.assertEqual(ISO.convert(201752, MMWR), 201752)
+    self.assertEqual(ISO.convert(201752, MMWR, offset=6), 201801)
+    self.assertEqual(MMWR.convert(201453, MMWR), 201453)